@@ -0,0 +1,85 @@
+"""
+Benchmark de los vecindarios granulares (listas de candidatos).
+
+Para cada instancia compara el vecindario completo con las listas de candidatos de k clientes más cercanos
+y k más compatibles, partiendo de la misma solución inicial y con la misma semilla. Reporta:
+- tiempo medio por iteración de movimiento,
+- pares de clientes candidatos para el intercambio,
+- mejor costo de las soluciones factibles visitadas (o el mejor costo, si ninguna fue factible).
+
+Uso (desde source/hair_service):
+    python -m benchmarks.granular
+    python -m benchmarks.granular --instancias abs1n50.dat abs3n50.dat --iteraciones 30 --evaluacion delta
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from benchmarks.memoria import preparar_contexto
+
+INSTANCIAS = ['abs1n20.dat', 'abs2n30.dat', 'abs3n40.dat', 'abs4n50.dat', 'abs5n50.dat']
+
+# (etiqueta, k, candidatos_mover)
+CONFIGURACIONES = [
+    ('completo', 0, False),
+    ('k=5', 5, False),
+    ('k=10', 10, False),
+    ('k=5 +mover', 5, True),
+]
+
+def ejecutar(solucion_inicial, iteraciones, semilla):
+    from hair.movimiento import movimiento
+    from modelos.gestores import TabuLists
+
+    random.seed(semilla)
+    tabulists = TabuLists()
+    solucion = solucion_inicial
+    mejor_factible, mejor = float('inf'), float('inf')
+    inicio = time.perf_counter()
+    for iterador in range(1, iteraciones + 1):
+        solucion = movimiento(solucion, tabulists, iterador)
+        mejor = min(mejor, solucion.costo())
+        if solucion.es_factible:
+            mejor_factible = min(mejor_factible, solucion.costo())
+    duracion = (time.perf_counter() - inicio) / iteraciones
+    return duracion, (mejor_factible if mejor_factible < float('inf') else mejor), mejor_factible < float('inf')
+
+def medir_instancia(instancia, politica_reabastecimiento, evaluacion, iteraciones, semilla):
+    from hair.inicializacion import inicializacion
+
+    contexto = preparar_contexto(instancia, politica_reabastecimiento)
+    contexto.evaluacion_vecindario = evaluacion
+    random.seed(semilla)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solucion_inicial = inicializacion()
+
+    base = None
+    for etiqueta, k, candidatos_mover in CONFIGURACIONES:
+        contexto.candidatos_k = k
+        contexto.candidatos_mover = candidatos_mover
+        contexto.matriz_candidatos = contexto.calcular_matriz_candidatos(k)
+        contexto.alfa.value = contexto.beta.value = contexto.penalty_min_limit
+        duracion, costo, factible = ejecutar(solucion_inicial, iteraciones, semilla)
+        if base is None:
+            base = (duracion, costo)
+        print(
+            f"{instancia} {politica_reabastecimiento} {etiqueta:<11} "
+            f"{duracion * 1000:9.1f} ms/it (x{base[0] / duracion:5.2f}), "
+            f"{int(contexto.matriz_candidatos.sum()) // 2:5d} pares, "
+            f"mejor costo {costo:10.2f}{'' if factible else ' (no factible)'} "
+            f"({(costo - base[1]) / base[1] * 100:+.2f}%)"
+        )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instancias", nargs='+', default=INSTANCIAS)
+    parser.add_argument("--politica_reabastecimiento", type=str, default="OU")
+    parser.add_argument("--evaluacion", type=str, default="completa", choices=["completa", "delta"])
+    parser.add_argument("--iteraciones", type=int, default=20)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    for instancia in args.instancias:
+        medir_instancia(instancia, args.politica_reabastecimiento, args.evaluacion, args.iteraciones, args.semilla)
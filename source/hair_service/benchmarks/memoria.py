@@ -0,0 +1,94 @@
+"""
+Benchmark de memoria de la representación de Solucion.
+
+Para cada instancia abs*n50.dat reporta:
+- bytes por Solucion derivada (medido con tracemalloc sobre soluciones vecinas retenidas),
+- RSS máximo del proceso durante la construcción de un vecindario completo (_crear_vecindario).
+
+Cada instancia se ejecuta en un proceso nuevo para que el RSS máximo sea independiente.
+
+Uso (desde source/hair_service):
+    python -m benchmarks.memoria
+    python -m benchmarks.memoria --instancia abs1n50.dat --politica_reabastecimiento OU
+"""
+import argparse
+import contextlib
+import io
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+INSTANCIAS = ['abs1n50.dat', 'abs2n50.dat', 'abs3n50.dat', 'abs4n50.dat', 'abs5n50.dat']
+
+def preparar_contexto(instancia, politica_reabastecimiento):
+    from console_main import read_input_irp
+    from modelos.contexto import Contexto
+    from modelos.contexto_file import contexto_ejecucion
+
+    horizonte_tiempo, proveedor, clientes, capacidad_vehiculo = read_input_irp(instancia, None)
+    contexto = Contexto(horizonte_tiempo, capacidad_vehiculo, proveedor, clientes, politica_reabastecimiento)
+    contexto_ejecucion.set(contexto)
+    return contexto
+
+def bytes_por_solucion(solucion, cantidad=2000):
+    """
+    Mide la memoria retenida por `cantidad` soluciones derivadas de `solucion` por edición de una visita,
+    con su estado derivado ya calculado.
+    """
+    contexto = solucion.contexto
+    tracemalloc.start()
+    inicio, _ = tracemalloc.get_traced_memory()
+    soluciones = []
+    while len(soluciones) < cantidad:
+        cliente = random.choice(contexto.clientes)
+        t = random.randrange(contexto.horizonte_tiempo)
+        if solucion.rutas[t].es_visitado(cliente):
+            vecino = solucion.eliminar_visita_atomica(cliente, t)
+        else:
+            vecino = solucion.insertar_visita_atomica(cliente, t)
+        vecino.costo()  # Fuerza el cálculo del estado derivado
+        soluciones.append(vecino)
+    fin, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (fin - inicio) / len(soluciones)
+
+def medir_instancia(instancia, politica_reabastecimiento):
+    from hair.inicializacion import inicializacion
+    from hair.movimiento import _crear_vecindario
+
+    random.seed(0)
+    preparar_contexto(instancia, politica_reabastecimiento)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solucion = inicializacion()
+
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    cantidad_vecinos = sum(1 for _ in _crear_vecindario(solucion))
+    duracion = time.perf_counter() - inicio
+    rss_maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(
+        f"{instancia} {politica_reabastecimiento}: "
+        f"{bytes_por_solucion(solucion):.0f} bytes/Solucion, "
+        f"RSS máximo {rss_maximo / 1024:.1f} MiB (+{(rss_maximo - rss_inicial) / 1024:.1f} MiB en el vecindario), "
+        f"{cantidad_vecinos} vecinos en {duracion:.2f} s"
+    )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instancia", type=str)
+    parser.add_argument("--politica_reabastecimiento", type=str, default="ML")
+    args = parser.parse_args()
+
+    if args.instancia:
+        medir_instancia(args.instancia, args.politica_reabastecimiento)
+    else:
+        for instancia in INSTANCIAS:
+            subprocess.run(
+                [sys.executable, '-m', 'benchmarks.memoria', '--instancia', instancia,
+                 '--politica_reabastecimiento', args.politica_reabastecimiento],
+                check=True
+            )
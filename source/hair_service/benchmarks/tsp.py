@@ -0,0 +1,84 @@
+"""
+Benchmark del optimizador de recorridos de LK (hair.tsp).
+
+Para cada instancia toma las rutas de las soluciones visitadas en unas iteraciones de movimiento desde la
+solución inicial, y las optimiza con el backend nativo y con OR-Tools. Reporta:
+- tiempo medio por ruta de cada backend,
+- suma del costo de los recorridos optimizados, y diferencia del nativo respecto de OR-Tools.
+
+Uso (desde source/hair_service):
+    python -m benchmarks.tsp
+    python -m benchmarks.tsp --instancias abs1n50.dat --limite_ms 1000
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from benchmarks.memoria import preparar_contexto
+
+INSTANCIAS = ['abs1n20.dat', 'abs2n30.dat', 'abs3n40.dat', 'abs4n50.dat', 'abs5n50.dat']
+
+def recolectar_rutas(iteraciones, semilla):
+    """
+    Rutas distintas (con al menos 3 clientes) de las soluciones visitadas desde la solución inicial.
+    """
+    from hair.inicializacion import inicializacion
+    from hair.movimiento import movimiento
+    from modelos.gestores import TabuLists
+
+    random.seed(semilla)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solucion = inicializacion()
+    tabulists = TabuLists()
+    rutas = {}
+    for iterador in range(1, iteraciones + 1):
+        for ruta in solucion.rutas:
+            if len(ruta.clientes) >= 3:
+                rutas.setdefault(tuple(cliente.indice for cliente in ruta.clientes), ruta)
+        solucion = movimiento(solucion, tabulists, iterador)
+    return list(rutas.values())
+
+def medir(rutas, backend):
+    from hair.tsp import optimizar_ruta
+    from modelos.contexto_file import contexto_ejecucion
+    from modelos.gestores import CacheRecorridos, TablaTransposicion
+
+    # Sin caché de recorridos, para que cada backend optimice todas las rutas
+    contexto = contexto_ejecucion.get()
+    contexto.tsp_backend = backend
+    contexto.cache_recorridos = CacheRecorridos(TablaTransposicion(0), None, contexto.huella_instancia)
+    inicio = time.perf_counter()
+    costo = sum(optimizar_ruta(ruta).costo for ruta in rutas)
+    return (time.perf_counter() - inicio) / len(rutas), costo
+
+def medir_instancia(instancia, politica_reabastecimiento, iteraciones, limite_ms, semilla):
+    contexto = preparar_contexto(instancia, politica_reabastecimiento)
+    contexto.tsp_limite_ms = limite_ms
+    rutas = recolectar_rutas(iteraciones, semilla)
+    if not rutas:
+        print(f"{instancia} {politica_reabastecimiento}: sin rutas de 3 o más clientes")
+        return
+    costo_inicial = sum(ruta.costo for ruta in rutas)
+    duracion_ortools, costo_ortools = medir(rutas, 'ortools')
+    duracion_nativo, costo_nativo = medir(rutas, 'nativo')
+    print(
+        f"{instancia} {politica_reabastecimiento} {len(rutas):4d} rutas "
+        f"(máx. {max(len(ruta.clientes) for ruta in rutas):2d} clientes), costo inicial {costo_inicial:10.0f} | "
+        f"ortools {duracion_ortools * 1000:7.2f} ms/ruta {costo_ortools:10.0f} | "
+        f"nativo {duracion_nativo * 1000:7.2f} ms/ruta {costo_nativo:10.0f} "
+        f"(x{duracion_ortools / duracion_nativo:6.1f}, {(costo_nativo - costo_ortools) / costo_ortools * 100:+.2f}%)"
+    )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--instancias", nargs='+', default=INSTANCIAS)
+    parser.add_argument("--politica_reabastecimiento", type=str, default="OU")
+    parser.add_argument("--iteraciones", type=int, default=20)
+    parser.add_argument("--limite_ms", type=float, default=20)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    for instancia in args.instancias:
+        medir_instancia(instancia, args.politica_reabastecimiento, args.iteraciones, args.limite_ms, args.semilla)
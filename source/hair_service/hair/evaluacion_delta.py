@@ -0,0 +1,399 @@
+import numpy as np
+from modelos.solucion import Solucion, _niveles_inventario_cliente, _violaciones_cliente
+from modelos.movimiento import Movimiento
+from modelos.entidad import Cliente
+
+class EvaluadorDelta:
+    """
+    Evalúa movimientos sobre una solución por diferencias, a partir de sus inventarios, cargas y costos
+    de ruta ya calculados, sin construir una Solucion por candidato.
+
+    Los movimientos se calculan sobre copias de las filas (entregas y visitas) de los clientes involucrados,
+    aplicando las mismas reglas OU/ML que `BorradorSolucion.insertar_visita` y `eliminar_visita`. En la
+    política ML la cantidad insertada es la máxima admisible (nivel_maximo - inventario), en lugar de un
+    valor aleatorio, para que la evaluación sea determinista.
+
+    Las inserciones y eliminaciones de todos los pares (cliente, tiempo) se evalúan a la vez con operaciones
+    de NumPy (`puntuar_inserciones` y `puntuar_eliminaciones`): cada movimiento se representa por su vector
+    de variaciones de entrega por periodo, en un arreglo clientes x periodos x periodos.
+    """
+
+    def __init__(self, solucion: Solucion) -> None:
+        contexto = solucion.contexto
+        self.solucion = solucion
+        self.contexto = contexto
+        self.entregas = solucion.entregas
+        self.visitas = solucion.visitas
+        self.inventarios = solucion.inventarios.astype(np.int64)
+        self.violaciones = solucion.violaciones_clientes
+        self.total_violaciones = int(self.violaciones.sum())
+        self.inventario_proveedor = solucion.inventario_proveedor[1:]
+        self.cargas = self.entregas.sum(axis=0, dtype=np.int64)
+        # Cantidad de columnas de inventario afectadas por una entrega en cada tiempo
+        self.pesos = np.arange(contexto.horizonte_tiempo, 0, -1, dtype=np.int64)
+        self.alfa = contexto.alfa.obtener_valor()
+        self.beta = contexto.beta.obtener_valor()
+
+        # Costos de inserción mínimos y ahorros de eliminación por (cliente, tiempo)
+        self.costos_insercion = np.empty(self.entregas.shape, dtype=np.float64)
+        self.ahorros_eliminacion = np.zeros(self.entregas.shape, dtype=np.float64)
+        for t, ruta in enumerate(solucion.rutas):
+            self.costos_insercion[:, t] = ruta.costos_insercion_minimos()
+            if ruta.clientes:
+                self.ahorros_eliminacion[[c.indice for c in ruta.clientes], t] = ruta.ahorros_eliminacion()
+
+        # Tiempo de la visita siguiente y de la anterior de cada cliente a cada tiempo (-1 si no hay)
+        cantidad_clientes, horizonte = self.visitas.shape
+        self.visita_siguiente = np.full((cantidad_clientes, horizonte), -1, dtype=np.int64)
+        self.visita_anterior = np.full((cantidad_clientes, horizonte), -1, dtype=np.int64)
+        proxima = np.full(cantidad_clientes, -1, dtype=np.int64)
+        for t in range(horizonte - 1, -1, -1):
+            self.visita_siguiente[:, t] = proxima
+            proxima = np.where(self.visitas[:, t], t, proxima)
+        previa = np.full(cantidad_clientes, -1, dtype=np.int64)
+        for t in range(horizonte):
+            self.visita_anterior[:, t] = previa
+            previa = np.where(self.visitas[:, t], t, previa)
+
+    def fila(self, cliente: Cliente) -> tuple[np.ndarray, np.ndarray]:
+        """Copias de las filas de entregas y visitas de un cliente."""
+        return self.entregas[cliente.indice].copy(), self.visitas[cliente.indice].copy()
+
+    def insertar(self, cliente: Cliente, entregas: np.ndarray, visitas: np.ndarray, t: int) -> None:
+        """
+        Inserta una visita en las filas del cliente. En OU, la siguiente visita se reduce en la cantidad
+        insertada, o se elimina si no recibe más que esa cantidad.
+        """
+        cantidad = int(cliente.nivel_maximo - _niveles_inventario_cliente(cliente, entregas)[t])
+        entregas[t] = cantidad
+        visitas[t] = True
+        if self.contexto.politica_reabastecimiento == "OU":
+            siguientes = np.flatnonzero(visitas[t + 1:])
+            if len(siguientes):
+                t_next = t + 1 + int(siguientes[0])
+                if entregas[t_next] > cantidad:
+                    entregas[t_next] -= cantidad
+                else:
+                    entregas[t_next] = 0
+                    visitas[t_next] = False
+
+    def eliminar(self, cliente: Cliente, entregas: np.ndarray, visitas: np.ndarray, t: int) -> bool:
+        """
+        Elimina una visita de las filas del cliente. En OU la cantidad se transfiere a la siguiente visita;
+        en ML, si hay desabastecimiento, se compensa en la visita anterior.
+
+        Returns:
+            bool: True si la visita pudo eliminarse (las filas sólo se modifican en ese caso).
+        """
+        cantidad_eliminada = int(entregas[t])
+        nuevas_entregas, nuevas_visitas = entregas.copy(), visitas.copy()
+        nuevas_entregas[t] = 0
+        nuevas_visitas[t] = False
+
+        eliminada = False
+        if self.contexto.politica_reabastecimiento == "OU":
+            siguientes = np.flatnonzero(visitas[t + 1:])
+            if len(siguientes):
+                nuevas_entregas[t + 1 + int(siguientes[0])] += cantidad_eliminada
+            eliminada = bool((_niveles_inventario_cliente(cliente, nuevas_entregas) >= cliente.nivel_minimo).all())
+
+        elif self.contexto.politica_reabastecimiento == "ML":
+            inventario = _niveles_inventario_cliente(cliente, nuevas_entregas)
+            eliminada = bool((inventario >= cliente.nivel_minimo).all())
+            anteriores = np.flatnonzero(visitas[:t])
+            if not eliminada and len(anteriores):
+                y = int(inventario[t:].min())
+                if y < cantidad_eliminada:
+                    nuevas_entregas[int(anteriores[-1])] += cantidad_eliminada - y
+                    eliminada = _violaciones_cliente(cliente, _niveles_inventario_cliente(cliente, nuevas_entregas)) == 0
+
+        if eliminada:
+            entregas[:] = nuevas_entregas
+            visitas[:] = nuevas_visitas
+        return eliminada
+
+    def _puntuar(self, variaciones: np.ndarray, delta_rutas: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Evalúa a la vez un movimiento por cada par (cliente, tiempo) que sólo modifica las entregas de ese cliente.
+
+        Args:
+            variaciones (np.ndarray): Arreglo clientes x periodos x periodos; variaciones[i, t] son los cambios
+                de entrega del cliente i en cada periodo para el movimiento (i, t).
+            delta_rutas (np.ndarray): Variación del costo de las rutas de cada movimiento (clientes x periodos).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Variación del costo y admisibilidad de cada movimiento (clientes x periodos).
+        """
+        contexto = self.contexto
+        minimos = contexto.niveles_minimos[:, None, None]
+        maximos = contexto.niveles_maximos[:, None, None]
+
+        # Inventario del cliente en las columnas 1..T; la columna 0 no cambia
+        variacion_inventario = np.cumsum(variaciones, axis=2)
+        inventarios = self.inventarios[:, None, 1:] + variacion_inventario
+        inventario_inicial = self.inventarios[:, 0]
+        admisible = ((inventarios >= minimos) & (inventarios <= maximos)).all(axis=2)
+        admisible &= (
+            (inventario_inicial >= contexto.niveles_minimos) & (inventario_inicial <= contexto.niveles_maximos) &
+            (self.total_violaciones - self.violaciones == 0)
+        )[:, None]
+
+        # El inventario del proveedor varía en sentido contrario al del cliente
+        costo_almacenamiento = (
+            (contexto.costos_almacenamiento - contexto.proveedor.costo_almacenamiento)[:, None] *
+            variacion_inventario.sum(axis=2)
+        )
+        delta_desabastecimiento = (
+            np.maximum(0, variacion_inventario - self.inventario_proveedor).sum(axis=2) -
+            np.maximum(0, -self.inventario_proveedor).sum()
+        )
+        delta_exceso = (
+            np.maximum(0, self.cargas + variaciones - contexto.capacidad_vehiculo).sum(axis=2) -
+            np.maximum(0, self.cargas - contexto.capacidad_vehiculo).sum()
+        )
+        delta = costo_almacenamiento + delta_rutas + delta_exceso * self.alfa + delta_desabastecimiento * self.beta
+        return delta, admisible
+
+    def puntuar_inserciones(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Evalúa la inserción de cada cliente en cada tiempo en que no es visitado, con las mismas reglas que `insertar`.
+
+        Returns:
+            tuple: Entregas y visitas resultantes del cliente (clientes x periodos x periodos), variación
+            del costo y admisibilidad (clientes x periodos).
+        """
+        cantidad_clientes, horizonte = self.entregas.shape
+        filas, tiempos = np.indices((cantidad_clientes, horizonte))
+        entregas = self.entregas.astype(np.int64)
+        cantidades = self.contexto.niveles_maximos[:, None] - self.inventarios[:, :horizonte]
+
+        variaciones = np.zeros((cantidad_clientes, horizonte, horizonte), dtype=np.int64)
+        variaciones[filas, tiempos, tiempos] = cantidades
+        visitas = np.repeat(self.visitas[:, None, :], horizonte, axis=1)
+        visitas[filas, tiempos, tiempos] = True
+        delta_rutas = self.costos_insercion.copy()
+
+        if self.contexto.politica_reabastecimiento == "OU":
+            # La siguiente visita se reduce en la cantidad insertada, o se elimina
+            con_siguiente = self.visita_siguiente >= 0
+            i, t, t_next = filas[con_siguiente], tiempos[con_siguiente], self.visita_siguiente[con_siguiente]
+            cantidad, proxima_cantidad = cantidades[i, t], entregas[i, t_next]
+            reducir = proxima_cantidad > cantidad
+            variaciones[i, t, t_next] = np.where(reducir, -cantidad, -proxima_cantidad)
+            i, t, t_next = i[~reducir], t[~reducir], t_next[~reducir]
+            visitas[i, t, t_next] = False
+            delta_rutas[i, t] -= self.ahorros_eliminacion[i, t_next]
+
+        delta, admisible = self._puntuar(variaciones, delta_rutas)
+        return entregas[:, None, :] + variaciones, visitas, delta, admisible & ~self.visitas
+
+    def puntuar_eliminaciones(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Evalúa la eliminación de cada visita de la solución, con las mismas reglas que `eliminar`.
+
+        Returns:
+            tuple: Entregas y visitas resultantes del cliente (clientes x periodos x periodos), variación
+            del costo y admisibilidad (clientes x periodos).
+        """
+        contexto = self.contexto
+        cantidad_clientes, horizonte = self.entregas.shape
+        filas, tiempos = np.indices((cantidad_clientes, horizonte))
+        entregas = self.entregas.astype(np.int64)
+
+        variaciones = np.zeros((cantidad_clientes, horizonte, horizonte), dtype=np.int64)
+        variaciones[filas, tiempos, tiempos] = -entregas
+        visitas = np.repeat(self.visitas[:, None, :], horizonte, axis=1)
+        visitas[filas, tiempos, tiempos] = False
+        delta_rutas = -self.ahorros_eliminacion
+        eliminables = self.visitas.copy()
+
+        if contexto.politica_reabastecimiento == "OU":
+            # La cantidad se transfiere a la siguiente visita
+            con_siguiente = self.visita_siguiente >= 0
+            i, t, t_next = filas[con_siguiente], tiempos[con_siguiente], self.visita_siguiente[con_siguiente]
+            variaciones[i, t, t_next] += entregas[i, t]
+
+        elif contexto.politica_reabastecimiento == "ML":
+            # Si hay desabastecimiento, se compensa en la visita anterior con la cantidad que falta
+            inventarios = self.inventarios[:, None, 1:] + np.cumsum(variaciones, axis=2)
+            sin_desabastecimiento = (
+                (inventarios >= contexto.niveles_minimos[:, None, None]).all(axis=2) &
+                (self.inventarios[:, 0] >= contexto.niveles_minimos)[:, None]
+            )
+            # y = mínimo del inventario desde el inicio de t, sin la visita
+            desde_t = np.arange(horizonte)[None, None, :] >= tiempos[:, :, None]
+            y = np.minimum(self.inventarios[:, :horizonte], np.where(desde_t, inventarios, np.iinfo(np.int64).max).min(axis=2))
+            compensar = ~sin_desabastecimiento & (self.visita_anterior >= 0) & (y < entregas)
+            i, t = filas[compensar], tiempos[compensar]
+            variaciones[i, t, self.visita_anterior[i, t]] += entregas[i, t] - y[i, t]
+            eliminables &= sin_desabastecimiento | compensar
+
+        delta, admisible = self._puntuar(variaciones, delta_rutas)
+        return entregas[:, None, :] + variaciones, visitas, delta, admisible & eliminables
+
+    def movimiento_cliente(self, tipo: str, cliente: Cliente, t_origen: int, t_destino: int, cantidad: int,
+                           entregas: np.ndarray, visitas: np.ndarray, delta: float) -> Movimiento:
+        """
+        Construye el descriptor de un movimiento ya evaluado a partir de las nuevas filas de entregas y visitas del cliente.
+        """
+        cambiados = (entregas != self.entregas[cliente.indice]) | (visitas != self.visitas[cliente.indice])
+        cambios = tuple(
+            (cliente, t, int(entregas[t]) if visitas[t] else None) for t in np.flatnonzero(cambiados).tolist()
+        )
+        return Movimiento(tipo, cliente, t_origen, t_destino, cantidad, cambios, float(delta))
+
+    def _delta_ruta(self, t: int, removidos: list, insertados: list) -> float:
+        """
+        Variación del costo de la ruta del tiempo t al quitar y luego insertar (en la posición más barata) clientes.
+        """
+        ruta = self.solucion.rutas[t]
+        if not insertados:
+            if len(removidos) == 1:
+                return -ruta.ahorro_eliminacion(removidos[0])
+        elif not removidos and len(insertados) == 1:
+            return float(ruta.costos_insercion(insertados[0]).min())
+
+        nueva_ruta = ruta
+        for cliente in removidos:
+            nueva_ruta = nueva_ruta.eliminar_visita(cliente)
+        for cliente in insertados:
+            nueva_ruta = nueva_ruta.insertar_visita(cliente, 0)
+        return nueva_ruta.costo - ruta.costo
+
+    def evaluar(self, tipo: str, cliente: Cliente, t_origen: int, t_destino: int, filas: dict,
+                cliente_intercambio: Cliente = None) -> Movimiento:
+        """
+        Evalúa por diferencias el movimiento dado por las nuevas filas de entregas y visitas de los clientes involucrados.
+
+        Args:
+            tipo (str): Tipo de movimiento.
+            cliente (Cliente): Cliente movido.
+            t_origen (int): Tiempo de origen (None en una inserción).
+            t_destino (int): Tiempo de destino (None en una eliminación).
+            filas (dict): Nuevas filas (entregas, visitas) por cliente.
+            cliente_intercambio (Cliente, opcional): Segundo cliente de un intercambio.
+
+        Returns:
+            Movimiento: Movimiento evaluado, o None si la solución resultante no es admisible o no cambia.
+        """
+        contexto = self.contexto
+        cambios = []
+        removidos, insertados = {}, {}
+        variacion_entregas = np.zeros(contexto.horizonte_tiempo, dtype=np.int64)
+        costo_almacenamiento = 0.0
+        violaciones_previas = 0
+
+        for c, (entregas, visitas) in filas.items():
+            diferencia = entregas.astype(np.int64) - self.entregas[c.indice]
+            cambio_visitas = visitas != self.visitas[c.indice]
+            if not diferencia.any() and not cambio_visitas.any():
+                continue
+            if _violaciones_cliente(c, _niveles_inventario_cliente(c, entregas)):
+                return None
+            violaciones_previas += int(self.violaciones[c.indice])
+            costo_almacenamiento += c.costo_almacenamiento * int(diferencia @ self.pesos)
+            variacion_entregas += diferencia
+            for t in np.flatnonzero(diferencia.astype(bool) | cambio_visitas).tolist():
+                cambios.append((c, t, int(entregas[t]) if visitas[t] else None))
+                if cambio_visitas[t]:
+                    (insertados if visitas[t] else removidos).setdefault(t, []).append(c)
+
+        if not cambios or self.total_violaciones - violaciones_previas > 0:
+            return None
+
+        # Almacenamiento del proveedor y desabastecimiento
+        costo_almacenamiento -= contexto.proveedor.costo_almacenamiento * int(variacion_entregas @ self.pesos)
+        nuevo_inventario_proveedor = self.inventario_proveedor - np.cumsum(variacion_entregas)
+        delta_desabastecimiento = int(
+            np.maximum(0, -nuevo_inventario_proveedor).sum() - np.maximum(0, -self.inventario_proveedor).sum()
+        )
+
+        # Exceso de capacidad de los vehículos
+        nuevas_cargas = self.cargas + variacion_entregas
+        delta_exceso = int(
+            np.maximum(0, nuevas_cargas - contexto.capacidad_vehiculo).sum() -
+            np.maximum(0, self.cargas - contexto.capacidad_vehiculo).sum()
+        )
+
+        delta_transporte = sum(
+            self._delta_ruta(t, removidos.get(t, []), insertados.get(t, []))
+            for t in set(removidos) | set(insertados)
+        )
+
+        entregas_cliente = filas[cliente][0]
+        cantidad = int(entregas_cliente[t_destino]) if t_destino is not None else int(self.entregas[cliente.indice, t_origen])
+        return Movimiento(
+            tipo, cliente, t_origen, t_destino, cantidad, tuple(cambios),
+            costo_almacenamiento + delta_transporte + delta_exceso * self.alfa + delta_desabastecimiento * self.beta,
+            cliente_intercambio
+        )
+
+def generar_movimientos(solucion: Solucion) -> list[Movimiento]:
+    """
+    Genera y evalúa por diferencias los movimientos admisibles de las cuatro variantes del vecindario
+    (eliminación, inserción, mover visita e intercambio de visitas), sin construir las soluciones vecinas.
+
+    Args:
+        solucion (Solucion): Solución actual.
+
+    Returns:
+        list[Movimiento]: Movimientos admisibles con su variación de costo.
+    """
+    evaluador = EvaluadorDelta(solucion)
+    contexto = solucion.contexto
+    movimientos = []
+
+    def agregar(movimiento):
+        if movimiento is not None:
+            movimientos.append(movimiento)
+
+    # Eliminación e inserción, evaluadas para todos los pares (cliente, tiempo) a la vez
+    entregas_eliminacion, visitas_eliminacion, delta_eliminacion, admisible_eliminacion = evaluador.puntuar_eliminaciones()
+    for t, ruta in enumerate(solucion.rutas):
+        for cliente in ruta.clientes:
+            i = cliente.indice
+            if admisible_eliminacion[i, t]:
+                movimientos.append(evaluador.movimiento_cliente(
+                    'eliminacion', cliente, t, None, int(evaluador.entregas[i, t]),
+                    entregas_eliminacion[i, t], visitas_eliminacion[i, t], delta_eliminacion[i, t]
+                ))
+
+    entregas_insercion, visitas_insercion, delta_insercion, admisible_insercion = evaluador.puntuar_inserciones()
+    for i, t in zip(*np.nonzero(admisible_insercion)):
+        movimientos.append(evaluador.movimiento_cliente(
+            'insercion', contexto.clientes[i], None, int(t), int(entregas_insercion[i, t, t]),
+            entregas_insercion[i, t], visitas_insercion[i, t], delta_insercion[i, t]
+        ))
+
+    # Mover visita
+    tiempos = {cliente: solucion.tiempos_cliente(cliente) for cliente in contexto.clientes}
+    for cliente in contexto.clientes:
+        for t_destino in solucion.tiempos_destino(cliente):
+            entregas, visitas = evaluador.fila(cliente)
+            evaluador.insertar(cliente, entregas, visitas, t_destino)
+            for t_origen in tiempos[cliente]:
+                entregas_mov, visitas_mov = entregas.copy(), visitas.copy()
+                if (not visitas_mov[t_origen]) or evaluador.eliminar(cliente, entregas_mov, visitas_mov, t_origen):
+                    if visitas_mov[t_destino] and not visitas_mov[t_origen]:
+                        agregar(evaluador.evaluar('mover', cliente, t_origen, t_destino, {cliente: (entregas_mov, visitas_mov)}))
+
+    # Intercambio: cliente1 pasa de t a t_prima y cliente2 de t_prima a t, sólo entre clientes candidatos
+    for i, cliente1 in enumerate(contexto.clientes):
+        for cliente2 in contexto.clientes[i + 1:]:
+            if not contexto.matriz_candidatos[i, cliente2.indice]:
+                continue
+            tiempos1, tiempos2 = set(tiempos[cliente1]), set(tiempos[cliente2])
+            for t in sorted(tiempos1 - tiempos2):
+                for t_prima in sorted(tiempos2 - tiempos1):
+                    filas = {}
+                    for c, t_o, t_d in ((cliente1, t, t_prima), (cliente2, t_prima, t)):
+                        entregas, visitas = evaluador.fila(c)
+                        evaluador.insertar(c, entregas, visitas, t_d)
+                        if visitas[t_o] and not evaluador.eliminar(c, entregas, visitas, t_o):
+                            break
+                        if not visitas[t_d]:
+                            break
+                        filas[c] = (entregas, visitas)
+                    else:
+                        agregar(evaluador.evaluar('intercambio', cliente1, t, t_prima, filas, cliente2))
+    return movimientos
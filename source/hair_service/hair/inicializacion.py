@@ -5,10 +5,11 @@ from modelos.ruta import Ruta
 def inicializacion():
     contexto = contexto_ejecucion.get()
     # Crear rutas iniciales como una tupla de objetos Ruta (inmutables)
-    solucion = Solucion(tuple(Ruta((), ()) for _ in range(contexto.horizonte_tiempo)))
+    borrador = Solucion(tuple(Ruta((), ()) for _ in range(contexto.horizonte_tiempo))).editar()
     for cliente in contexto.clientes:
         for t in range(contexto.horizonte_tiempo):
-            if solucion.inventario_clientes[cliente.id][t + 1] <= cliente.nivel_minimo:    
-                solucion = solucion.insertar_visita(cliente, t, len(solucion.rutas[t].clientes))
+            if borrador.inventario_cliente(cliente)[t + 1] <= cliente.nivel_minimo:    
+                borrador.insertar_visita(cliente, t, len(borrador.rutas[t].clientes))
+    solucion = borrador.confirmar()
     print(solucion)
     return solucion
@@ -1,3 +1,4 @@
+import logging
 import requests
 import math
 import random
@@ -10,6 +11,9 @@ from hair.inicializacion import inicializacion
 from hair.movimiento import movimiento
 from hair.mejora import mejora
 from hair.salto import salto
+from hair.vecindario_paralelo import cerrar_pools
+
+logger = logging.getLogger(__name__)
 
 def execute(horizonte_tiempo, capacidad_vehiculo, proveedor, clientes, politica_reabastecimiento=None):
     seed(datetime.now().timestamp())
@@ -18,7 +22,15 @@ def execute(horizonte_tiempo, capacidad_vehiculo, proveedor, clientes, politica_
         politica_reabastecimiento
     )
     contexto_ejecucion.set(contexto)
+    try:
+        return _ejecutar_busqueda(contexto, politica_reabastecimiento)
+    finally:
+        cerrar_pools(contexto)
 
+def _ejecutar_busqueda(contexto, politica_reabastecimiento):
+    """
+    Búsqueda de `execute()` sobre el contexto ya creado.
+    """
     iterador_principal = 0
     iteraciones_sin_mejoras = 0
     tabulists = TabuLists()
@@ -102,6 +114,11 @@ def execute(horizonte_tiempo, capacidad_vehiculo, proveedor, clientes, politica_
     # mejor_solucion.graficar_rutas()
     mejor_solucion = mejor_solucion.clonar()
     print(f"{len(solucion.contexto.clientes)} {politica_reabastecimiento} => {mejor_solucion.costo()}")
+    logger.debug("%s", contexto.estadisticas_vecindario)
+    logger.debug("%s", contexto.tabla_transposicion)
+    logger.debug("%s", contexto.cache_recorridos)
+    if contexto.modelos_mip is not None:
+        logger.debug("%s", contexto.modelos_mip)
     execution_time = int((datetime.now() - start).total_seconds())
     admisibilidad = 'N' if (not mejor_solucion.es_admisible) else ('F' if mejor_solucion.es_factible else 'A')
     # mejor_solucion.imprimir_detalle()
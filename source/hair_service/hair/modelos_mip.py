@@ -0,0 +1,418 @@
+"""
+Modelos MIP1 y MIP2 de la mejora, persistentes durante la ejecución.
+
+La parte estática de cada modelo (variables, balance de inventarios, capacidad y no negatividad) depende
+sólo de la instancia, por lo que se construye una única vez por contexto. En cada llamada sólo se
+actualizan los coeficientes y cotas que dependen de la solución (sigma, ahorros de eliminación y costos
+de inserción), y únicamente en las entradas que cambiaron respecto de la llamada anterior.
+
+El backend de `pywraplp` (SCIP, CBC, HIGHS, ...), el límite de tiempo y el gap relativo por llamada se
+configuran en la sección [MIP]. Con `hint`, la solución actual (sin eliminaciones ni inserciones) se pasa
+al solver como solución inicial sugerida.
+"""
+import time
+import numpy as np
+from ortools.linear_solver import pywraplp
+from modelos.contexto import Contexto
+from modelos.solucion import Solucion
+
+class ModeloMIP:
+    """
+    Modelo MIP sobre un solver persistente, con los tiempos de construcción, actualización y
+    resolución medidos por separado.
+
+    Cada resolución se registra en `resoluciones` como (estado, segundos, valor objetivo, mejor cota),
+    con el valor objetivo None si no se encontró solución.
+    """
+
+    nombre = 'MIP'
+
+    def __init__(self, contexto: Contexto) -> None:
+        inicio = time.perf_counter()
+        self.contexto = contexto
+        self.solver = pywraplp.Solver.CreateSolver(contexto.mip_backend)
+        if not self.solver:
+            raise Exception(f"No se pudo inicializar el solver {contexto.mip_backend}.")
+        if contexto.mip_limite_ms > 0:
+            self.solver.SetTimeLimit(int(contexto.mip_limite_ms))
+        self.parametros = pywraplp.MPSolverParameters()
+        if contexto.mip_gap > 0:
+            self.parametros.SetDoubleParam(pywraplp.MPSolverParameters.RELATIVE_MIP_GAP, contexto.mip_gap)
+        if contexto.mip_hint:
+            # SCIP acumula las soluciones sugeridas de cada resolución hasta rechazarlas por límite; sin
+            # incrementalidad el problema del backend se vuelve a extraer del modelo en cada llamada
+            self.parametros.SetIntegerParam(
+                pywraplp.MPSolverParameters.INCREMENTALITY, pywraplp.MPSolverParameters.INCREMENTALITY_OFF
+            )
+        self.U = {cliente.id: cliente.nivel_maximo for cliente in contexto.clientes}
+        self.sigma = np.zeros((len(contexto.clientes), contexto.horizonte_tiempo), dtype=bool)
+        self._construir()
+        self.tiempo_construccion = time.perf_counter() - inicio
+        self.tiempo_actualizacion = 0.0
+        self.tiempo_resolucion = 0.0
+        self.llamadas = 0
+        self.resoluciones = []
+
+    def __str__(self) -> str:
+        tiempos = np.array([tiempo for _, tiempo, _, _ in self.resoluciones])
+        sin_optimo = sum(estado != pywraplp.Solver.OPTIMAL for estado, _, _, _ in self.resoluciones)
+        return (
+            f"{self.nombre}: construcción {self.tiempo_construccion:.3f} s, {self.llamadas} llamadas, "
+            f"actualización {self.tiempo_actualizacion:.3f} s, resolución {self.tiempo_resolucion:.3f} s"
+            + (f" (p95 {np.percentile(tiempos, 95) * 1000:.0f} ms, máx. {tiempos.max() * 1000:.0f} ms, "
+               f"{sin_optimo} sin óptimo probado)" if len(tiempos) else "")
+        )
+
+    def resolver(self, solucion: Solucion) -> int:
+        """
+        Actualiza el modelo a la solución y lo resuelve.
+
+        Args:
+            solucion (Solucion): Solución actual del IRP.
+
+        Returns:
+            int: Estado de la resolución (pywraplp.Solver.OPTIMAL, FEASIBLE, INFEASIBLE, ...).
+        """
+        inicio = time.perf_counter()
+        self._actualizar(solucion)
+        if self.contexto.mip_hint:
+            self.solver.SetHint(self.variables_hint, self._valores_hint(solucion).tolist())
+        medio = time.perf_counter()
+        status = self.solver.Solve(self.parametros)
+        duracion = time.perf_counter() - medio
+        self.tiempo_actualizacion += medio - inicio
+        self.tiempo_resolucion += duracion
+        self.llamadas += 1
+        resuelto = status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE)
+        self.resoluciones.append((
+            status, duracion, self.solver.Objective().Value() if resuelto else None,
+            self.solver.Objective().BestBound() if resuelto else None
+        ))
+        return status
+
+    def _construir_inventarios(self) -> None:
+        """
+        Agrega las restricciones comunes a ambos modelos: valores iniciales, balances de inventario,
+        política OU, capacidad y no negatividad. Requiere las variables x, I, B y theta.
+        """
+        contexto, solver, U = self.contexto, self.solver, self.U
+        x, I, B, theta = self.x, self.I, self.B, self.theta
+
+        # Fijar valores iniciales conocidos
+        B_inicial = contexto.proveedor.nivel_almacenamiento
+        solver.Add(B[0] == B_inicial)
+        for i in contexto.clientes:
+            I_inicial = i.nivel_almacenamiento
+            solver.Add(I[i.id, 0] == I_inicial)
+
+        # (2) El inventario del proveedor en cada periodo se calcula como el inventario del periodo anterior,
+        # más la producción del proveedor, menos la cantidad entregada a los clientes en el tiempo anterior.
+        for t in range(1, contexto.horizonte_tiempo + 1):
+            solver.Add(B[t] == B[t - 1] + contexto.proveedor.nivel_produccion - sum(x[i.id, t - 1] for i in contexto.clientes))
+
+        # (3) **Balance de inventario del proveedor**
+        for t in range(contexto.horizonte_tiempo):
+            solver.Add(B[t] >= sum(x[i.id, t] for i in contexto.clientes))
+
+        # (4) **Balance de inventario del cliente**
+        for i in contexto.clientes:
+            for t in range(1, contexto.horizonte_tiempo + 1):
+                solver.Add(I[i.id, t] == I[i.id, t - 1] + x[i.id, t - 1] - i.nivel_demanda)
+
+        if contexto.politica_reabastecimiento == "OU":
+            for i in contexto.clientes:
+                for t in range(contexto.horizonte_tiempo):
+                    ## (5) **Inventario debe estar entre 0 y el máximo del cliente**
+                    solver.Add(x[i.id, t] >= U[i.id] * theta[i.id, t] - I[i.id, t])
+                    ## (7) **Restricciones de la política OU**
+                    solver.Add(x[i.id, t] <= U[i.id] * theta[i.id, t])
+
+        ## (6) **Un cliente solo puede recibir entrega si su inventario lo permite**
+        for i in contexto.clientes:
+            for t in range(contexto.horizonte_tiempo):
+                solver.Add(x[i.id, t] <= U[i.id] - I[i.id, t])
+
+        ## (8) **Restricción de capacidad del vehículo**
+        for t in range(contexto.horizonte_tiempo):
+            solver.Add(sum(x[i.id, t] for i in contexto.clientes) <= contexto.capacidad_vehiculo)
+
+    def _construir_no_negatividad(self) -> None:
+        """
+        Agrega las restricciones de no negatividad (14), (15) y (16).
+        """
+        contexto, solver = self.contexto, self.solver
+        x, I, B = self.x, self.I, self.B
+
+        ## (14) Restricción de no negatividad en la cantidad entregada x_{it}
+        # La cantidad de productos entregados a un cliente en un período no puede ser negativa.
+        for i in contexto.clientes:
+            for t in range(contexto.horizonte_tiempo):
+                solver.Add(x[i.id, t] >= 0)
+
+        ## (15) Restricción de no negatividad en el inventario I_{it}
+        # El inventario de un cliente en un período no puede ser negativo.
+        for i in contexto.clientes:
+            for t in range(contexto.horizonte_tiempo + 1):
+                solver.Add(I[i.id, t] >= 0)
+
+        ## (16) Restricción de no negatividad en el inventario del proveedor B_t
+        # El inventario del proveedor en un período no puede ser negativo.
+        for t in range(contexto.horizonte_tiempo + 1):
+            solver.Add(B[t] >= 0)
+
+    def _costo_almacenamiento(self):
+        """
+        Término de costo de almacenamiento del proveedor y de los clientes de la función objetivo.
+        """
+        contexto = self.contexto
+        return (
+            contexto.proveedor.costo_almacenamiento * sum(self.B[t] for t in range(contexto.horizonte_tiempo + 1))
+            + sum(sum(i.costo_almacenamiento * self.I[i.id, t] for i in contexto.clientes)
+                for t in range(contexto.horizonte_tiempo + 1))
+        )
+
+    @staticmethod
+    def _matriz_ahorro(solucion: Solucion) -> np.ndarray:
+        """
+        Ahorro de eliminar cada cliente de cada ruta de la solución (0 si no la visita), indexado por
+        (cliente.indice, tiempo).
+        """
+        ahorro = np.zeros(solucion.visitas.shape)
+        for t, ruta in enumerate(solucion.rutas):
+            ahorro[[cliente.indice for cliente in ruta.clientes], t] = ruta.ahorros_eliminacion()
+        return ahorro
+
+class ModeloMIP1(ModeloMIP):
+    """
+    MIP1: asignación de las rutas de la solución a los tiempos, con eliminación de clientes.
+
+    Las rutas se identifican por su índice en la solución; sigma[i, r] indica si la ruta r visita al
+    cliente i. Sigma aparece multiplicando a las variables z y w en las restricciones (11), (12) y (13),
+    por lo que su actualización es un cambio de coeficientes.
+    """
+
+    nombre = 'MIP1'
+
+    def _construir(self) -> None:
+        contexto, solver, U = self.contexto, self.solver, self.U
+        T = contexto.horizonte_tiempo
+
+        # Definición de variables
+        self.w, self.theta, self.z, self.x, self.I, self.B = w, theta, z, x, I, B = {}, {}, {}, {}, {}, {}
+        for r in range(T):
+            for i in contexto.clientes:
+                w[i.id, r] = solver.BoolVar(f"w_{i.id}_{r}")
+
+        for t in range(T):
+            for i in contexto.clientes:
+                theta[i.id, t] = solver.BoolVar(f"theta_{i.id}_{t}")
+                x[i.id, t] = solver.IntVar(-solver.infinity(), U[i.id], f"x_{i.id}_{t}")
+
+        for r in range(T):
+            for t in range(T):
+                z[r, t] = solver.BoolVar(f"z_{r}_{t}")
+
+        for t in range(T + 1):
+            for i in contexto.clientes:
+                I[i.id, t] = solver.IntVar(-solver.infinity(), U[i.id], f"I_{i.id}_{t}")
+            B[t] = solver.IntVar(-solver.infinity(), solver.infinity(), f"B_{t}")
+
+        self._construir_inventarios()
+
+        ## (9) **Cada ruta r solo puede ser asignada a un periodo t**
+        for r in range(T):
+            solver.Add(sum(z[r, t] for t in range(T)) <= 1)
+
+        ## (10) **Máximo de una ruta en cada periodo**
+        for t in range(T):
+            solver.Add(sum(z[r, t] for r in range(T)) <= 1)
+
+        ## (11) **Un cliente solo puede ser servido si está en la ruta asignada al tiempo t**
+        # x[i, t] - U[i] * sum_r(sigma[i, r] * z[r, t]) <= 0
+        self.servicio = {(i.id, t): solver.Add(x[i.id, t] <= 0) for i in contexto.clientes for t in range(T)}
+
+        ## (12) **Si un cliente es removido, no puede ser servido en t**
+        # x[i, t] + U[i] * sigma[i, t] * (z[t, t] + w[i, t]) <= 2 * U[i]
+        self.remocion = {(i.id, t): solver.Add(x[i.id, t] <= 2 * U[i.id]) for i in contexto.clientes for t in range(T)}
+
+        ## (13) **Un cliente solo puede ser removido si estaba en la ruta original**
+        # w[i, r] - sigma[i, r] * sum_t(z[r, t]) <= 0
+        self.removible = {(i.id, r): solver.Add(w[i.id, r] <= 0) for i in contexto.clientes for r in range(T)}
+
+        self._construir_no_negatividad()
+
+        # Los coeficientes de ahorro de w se fijan en cada llamada
+        solver.Minimize(self._costo_almacenamiento())
+        self.ahorro = np.zeros(self.sigma.shape)
+
+        # Variables de la solución sugerida, en el orden de `_valores_hint`
+        self.variables_hint = (
+            [w[i.id, r] for r in range(T) for i in contexto.clientes]
+            + [theta[i.id, t] for i in contexto.clientes for t in range(T)]
+            + [x[i.id, t] for i in contexto.clientes for t in range(T)]
+            + [z[r, t] for r in range(T) for t in range(T)]
+            + [I[i.id, t] for i in contexto.clientes for t in range(T + 1)]
+            + [B[t] for t in range(T + 1)]
+        )
+
+    def _valores_hint(self, solucion: Solucion) -> np.ndarray:
+        """
+        La solución actual: cada ruta en su tiempo, sin eliminaciones.
+        """
+        T = self.contexto.horizonte_tiempo
+        return np.concatenate((
+            np.zeros(self.sigma.size), solucion.visitas.ravel(), solucion.entregas.ravel(), np.eye(T).ravel(),
+            solucion.inventarios.ravel(), solucion.inventario_proveedor
+        )).astype(float)
+
+    def _actualizar(self, solucion: Solucion) -> None:
+        contexto, objetivo = self.contexto, self.solver.Objective()
+        T = contexto.horizonte_tiempo
+
+        sigma = solucion.visitas
+        for indice, r in np.argwhere(sigma != self.sigma).tolist():
+            i = contexto.clientes[indice]
+            s = int(sigma[indice, r])
+            for t in range(T):
+                self.servicio[i.id, t].SetCoefficient(self.z[r, t], -self.U[i.id] * s)
+                self.removible[i.id, r].SetCoefficient(self.z[r, t], -s)
+            self.remocion[i.id, r].SetCoefficient(self.z[r, r], self.U[i.id] * s)
+            self.remocion[i.id, r].SetCoefficient(self.w[i.id, r], self.U[i.id] * s)
+        self.sigma = sigma
+
+        ahorro = self._matriz_ahorro(solucion)
+        for indice, r in np.argwhere(ahorro != self.ahorro).tolist():
+            objetivo.SetCoefficient(self.w[contexto.clientes[indice].id, r], -float(ahorro[indice, r]))
+        self.ahorro = ahorro
+
+class ModeloMIP2(ModeloMIP):
+    """
+    MIP2: inserción y eliminación de clientes en las rutas de la solución.
+
+    sigma[i, t] indica si el cliente i es visitado en el tiempo t. Sigma sólo aparece en los lados
+    derechos de (21), (22) y (23), que se actualizan como cotas de las restricciones.
+    """
+
+    nombre = 'MIP2'
+
+    def _construir(self) -> None:
+        contexto, solver, U = self.contexto, self.solver, self.U
+        T = contexto.horizonte_tiempo
+
+        # Variables de decisión
+        self.x = x = {}          # Cantidad entregada a cliente i en tiempo t
+        self.I = I = {}          # Inventario del cliente i en tiempo t
+        self.B = B = {}          # Inventario del proveedor en tiempo t
+        self.w = w = {}          # Binary: 1 si el cliente i es removido en tiempo t
+        self.v = v = {}          # Binary: 1 si el cliente i es insertado en tiempo t
+        self.theta = theta = {}  # Binary: 1 si el cliente i es visitado en tiempo t (para OU)
+
+        # Initialize variables
+        for t in range(T):
+            for i in contexto.clientes:
+                w[i.id, t] = solver.BoolVar(f"w_{i.id}_{t}")
+                v[i.id, t] = solver.BoolVar(f"v_{i.id}_{t}")
+                x[i.id, t] = solver.IntVar(-solver.infinity(), U[i.id], f"x_{i.id}_{t}")
+
+        for t in range(T + 1):
+            for i in contexto.clientes:
+                I[i.id, t] = solver.IntVar(-solver.infinity(), U[i.id], f"I_{i.id}_{t}")
+                theta[i.id, t] = solver.BoolVar(f"theta_{i.id}_{t}")
+            B[t] = solver.IntVar(-solver.infinity(), solver.infinity(), f"B_{t}")
+
+        self._construir_inventarios()
+        self._construir_no_negatividad()
+
+        # (21) El cliente no puede insertarse si ya está en la ruta: v[i, t] <= 1 - sigma[i, t]
+        self.insertable = {(i.id, t): solver.Add(v[i.id, t] <= 1) for i in contexto.clientes for t in range(T)}
+
+        # (22) El cliente no puede removerse si no está en la ruta: w[i, t] <= sigma[i, t]
+        self.removible = {(i.id, t): solver.Add(w[i.id, t] <= 0) for i in contexto.clientes for t in range(T)}
+
+        # (23) Condición de servicio de cliente: x[i, t] <= U[i] * (sigma[i, t] - w[i, t] + v[i, t])
+        self.servicio = {
+            (i.id, t): solver.Add(x[i.id, t] + U[i.id] * w[i.id, t] - U[i.id] * v[i.id, t] <= 0)
+            for i in contexto.clientes for t in range(T)
+        }
+
+        # Objective function (20); los coeficientes de ahorro de w y de inserción de v se fijan en cada llamada
+        solver.Minimize(self._costo_almacenamiento())
+        self.ahorro = np.zeros(self.sigma.shape)
+        self.costo_insercion = np.zeros(self.sigma.shape)
+
+        # Variables de la solución sugerida, en el orden de `_valores_hint`
+        self.variables_hint = (
+            [w[i.id, t] for t in range(T) for i in contexto.clientes]
+            + [v[i.id, t] for t in range(T) for i in contexto.clientes]
+            + [x[i.id, t] for i in contexto.clientes for t in range(T)]
+            + [theta[i.id, t] for i in contexto.clientes for t in range(T)]
+            + [I[i.id, t] for i in contexto.clientes for t in range(T + 1)]
+            + [B[t] for t in range(T + 1)]
+        )
+
+    def _valores_hint(self, solucion: Solucion) -> np.ndarray:
+        """
+        La solución actual: sin eliminaciones ni inserciones.
+        """
+        return np.concatenate((
+            np.zeros(2 * self.sigma.size), solucion.entregas.ravel(), solucion.visitas.ravel(),
+            solucion.inventarios.ravel(), solucion.inventario_proveedor
+        )).astype(float)
+
+    def _actualizar(self, solucion: Solucion) -> None:
+        contexto, objetivo = self.contexto, self.solver.Objective()
+
+        sigma = solucion.visitas
+        for indice, t in np.argwhere(sigma != self.sigma).tolist():
+            i = contexto.clientes[indice]
+            s = int(sigma[indice, t])
+            self.insertable[i.id, t].SetUb(1 - s)
+            self.removible[i.id, t].SetUb(s)
+            self.servicio[i.id, t].SetUb(self.U[i.id] * s)
+        self.sigma = sigma
+
+        ahorro = self._matriz_ahorro(solucion)
+        for indice, t in np.argwhere(ahorro != self.ahorro).tolist():
+            objetivo.SetCoefficient(self.w[contexto.clientes[indice].id, t], -float(ahorro[indice, t]))
+        self.ahorro = ahorro
+
+        # Costo de insertar cada cliente en la posición de menor costo de cada ruta (0 si ya la visita)
+        costo_insercion = -np.column_stack([ruta.costos_insercion_minimos() for ruta in solucion.rutas])
+        costo_insercion[sigma] = 0
+        for indice, t in np.argwhere(costo_insercion != self.costo_insercion).tolist():
+            objetivo.SetCoefficient(self.v[contexto.clientes[indice].id, t], float(costo_insercion[indice, t]))
+        self.costo_insercion = costo_insercion
+
+class GestorModelosMIP:
+    """
+    Modelos MIP1 y MIP2 de un contexto, construidos la primera vez que se usan.
+    """
+
+    def __init__(self, contexto: Contexto) -> None:
+        self.contexto = contexto
+        self._mip1 = None
+        self._mip2 = None
+
+    def __str__(self) -> str:
+        modelos = [str(modelo) for modelo in (self._mip1, self._mip2) if modelo is not None]
+        return "Modelos MIP: " + ("; ".join(modelos) if modelos else "sin usar")
+
+    @property
+    def mip1(self) -> ModeloMIP1:
+        if self._mip1 is None:
+            self._mip1 = ModeloMIP1(self.contexto)
+        return self._mip1
+
+    @property
+    def mip2(self) -> ModeloMIP2:
+        if self._mip2 is None:
+            self._mip2 = ModeloMIP2(self.contexto)
+        return self._mip2
+
+def obtener_modelos(contexto: Contexto) -> GestorModelosMIP:
+    """
+    Devuelve los modelos MIP del contexto, creando su gestor al primer uso.
+    """
+    if contexto.modelos_mip is None:
+        contexto.modelos_mip = GestorModelosMIP(contexto)
+    return contexto.modelos_mip
@@ -1,4 +1,10 @@
+import random
+import time
+from typing import Iterator
 from modelos.solucion import Solucion
+from modelos.gestores import SelectorVecindario
+from hair.evaluacion_delta import generar_movimientos
+from hair import vecindario_paralelo
 from random import randint
 
 def movimiento(solucion: Solucion, tabulists, iterador_principal: int) -> Solucion:
@@ -11,24 +17,23 @@ def movimiento(solucion: Solucion, tabulists, iterador_principal: int) -> Soluci
         solucion (Solucion): La solución actual.
         iterador_principal (int): El número de iteraciones del algoritmo.
 
+    Con `evaluacion = delta` en la sección [Movimiento] de la configuración, los vecinos se evalúan
+    como movimientos por diferencias (ver `hair.evaluacion_delta`) y sólo se construyen, y se les aplican
+    los ajustes del paso 2, los mejores movimientos permitido y no permitido. Con `evaluacion = completa`,
+    `exploracion` define qué parte de N(s) se recorre (ver `_explorar_vecindario`).
+
     Returns:
         Solucion: La mejor solución encontrada para el vecindario de la solución ingresada.
     """
-    # Crear el vecindario completo (N(s))
-    vecindario = _crear_vecindario(solucion)
-    if len(vecindario) > 0:
-        mejor_solucion = min(
-            (vecino for vecino in vecindario if (tabulists.movimiento_permitido(solucion, vecino))),
-            default=None,
-            key=lambda v: v.costo()
-        )
-
-        mejor_solucion_no_permitida = min(
-            (vecino for vecino in vecindario if (not tabulists.movimiento_permitido(solucion, vecino))),
-            default=None,
-            key=lambda v: v.costo()
-        )
-        
+    # Los vecinos registran los clientes que cambian respecto de la solución actual
+    solucion = solucion.como_origen()
+    if solucion.contexto.evaluacion_vecindario == "delta":
+        mejor_solucion, mejor_solucion_no_permitida = _seleccionar_movimientos(solucion, tabulists)
+        hay_vecinos = (mejor_solucion is not None) or (mejor_solucion_no_permitida is not None)
+    else:
+        mejor_solucion, mejor_solucion_no_permitida, hay_vecinos = _explorar_vecindario(solucion, tabulists)
+
+    if hay_vecinos:
         if mejor_solucion is not None:
             if mejor_solucion_no_permitida is not None: 
                 # Normalización del progreso dentro del ciclo de salto
@@ -49,113 +54,289 @@ def movimiento(solucion: Solucion, tabulists, iterador_principal: int) -> Soluci
     # print(f"Movimiento {mejor_solucion}")
     return mejor_solucion
 
-def _crear_vecindario(solucion: Solucion) -> list[Solucion]:
+def _explorar_vecindario(solucion: Solucion, tabulists) -> tuple[Solucion, Solucion, bool]:
+    """
+    Recorre N(s) según el modo de exploración (`exploracion` en la sección [Movimiento] de la configuración)
+    y devuelve el mejor vecino permitido y el mejor no permitido por las listas tabú entre los evaluados:
+
+    - completa: todo N(s).
+    - primera_mejora: se detiene en el primer vecino permitido que mejora el costo de la solución actual.
+    - muestreo: evalúa un subconjunto aleatorio de `presupuesto` unidades de trabajo (variante y cliente o tiempo).
+    - tiempo: se detiene pasados `limite_ms` milisegundos (al menos una unidad de trabajo se evalúa).
+
+    Salvo en la exploración completa, las unidades de trabajo se recorren en orden aleatorio y en este proceso.
+
+    Returns:
+        tuple[Solucion, Solucion, bool]: Mejor vecino permitido, mejor no permitido (None si no existen)
+        y si se encontró algún vecino.
+    """
+    contexto = solucion.contexto
+    exploracion = contexto.exploracion_vecindario
+    selector = SelectorVecindario(solucion, tabulists, contexto.diversificacion_k)
+    if exploracion == "completa":
+        for vecino in _crear_vecindario(solucion):
+            selector.agregar(vecino)
+        return selector.elegir()
+
+    unidades = _unidades_vecindario(solucion)
+    semillas = [random.getrandbits(64) for _ in unidades]
+    semilla_ajuste = random.getrandbits(64)
+    orden = random.sample(range(len(unidades)), len(unidades))
+    if exploracion == "muestreo":
+        orden = orden[:contexto.presupuesto_vecindario]
+    limite = time.perf_counter() + contexto.limite_ms_vecindario / 1000
+    costo_actual = solucion.costo()
+
+    estado = random.getstate()
+    repetidos = {'antes_ajuste': 0, 'despues_ajuste': 0}
+    vistos_antes_ajuste, vistos = set(), set()
+    for i in orden:
+        mejora = False
+        for vecino in _evaluar_unidad(solucion, unidades[i], semillas[i], semilla_ajuste, vistos_antes_ajuste, repetidos):
+            if vecino._hash in vistos:
+                repetidos['despues_ajuste'] += 1
+                continue
+            vistos.add(vecino._hash)
+            permitido = selector.agregar(vecino)
+            mejora = exploracion == "primera_mejora" and permitido and vecino.costo() < costo_actual
+            if mejora:
+                break
+        if mejora or (exploracion == "tiempo" and time.perf_counter() >= limite):
+            break
+    random.setstate(estado)
+    contexto.estadisticas_vecindario.registrar(**repetidos)
+    return selector.elegir()
+
+def _crear_vecindario(solucion: Solucion) -> Iterator[Solucion]:
     """
     Construcción del vecindario N(s), asegurando adherencia estricta a la teoría.
     Se genera primero N'(s) con las variantes básicas y luego se aplican ajustes adicionales
     según la política OU o ML.
+
+    El trabajo se divide en unidades independientes (una variante restringida a un tiempo o a un cliente),
+    cada una con su propia semilla tomada de `random`. Así el resultado es el mismo si las unidades se
+    evalúan en este proceso o repartidas en un pool de procesos (`procesos` en la sección [Movimiento]
+    de la configuración).
+
+    Los vecinos se generan a medida que se consumen, por lo que el vecindario nunca se guarda completo en
+    memoria. Los repetidos se descartan por contenido (hash de visitas y cantidades) antes del ajuste del
+    paso 2 y después de él; las cantidades descartadas se registran en `contexto.estadisticas_vecindario`.
     """
     contexto = solucion.contexto
-    vecindario = []
-
-    # Paso 1: Crear N'(s) aplicando las variantes estándar de generación de vecinos
-    vecindario_prima = [
-        vecino for variante in [
-            _variante_eliminacion,
-            _variante_insercion,
-            _variante_mover_visita,
-            _variante_intercambiar_visitas
-        ] for vecino in variante(solucion)
-    ]
-    # Paso 2: Aplicar ajustes adicionales basados en la teoría
-    for solucion_prima in vecindario_prima:
-        conjunto_A = [cliente for cliente in contexto.clientes if (solucion.tiempos_cliente(cliente) != solucion_prima.tiempos_cliente(cliente))]
-        while conjunto_A:
-            cliente_i = conjunto_A.pop(randint(0, len(conjunto_A) - 1))
-            for t in solucion_prima.tiempos_cliente(cliente_i):
-                for cliente_j in solucion_prima.rutas[t].clientes: 
-                    if cliente_j.costo_almacenamiento > contexto.proveedor.costo_almacenamiento or \
-                       solucion_prima.rutas[t].obtener_total_entregado() > contexto.capacidad_vehiculo or \
-                       solucion_prima.inventario_proveedor[t] < 0:
-
-                        if contexto.politica_reabastecimiento == "OU":
-                            solucion_nueva = solucion_prima.eliminar_visita(cliente_j, t)                            
-                            if solucion_nueva.es_admisible and solucion_nueva.costo() < solucion_prima.costo():
-                               solucion_prima = solucion_nueva.clonar()
-                               conjunto_A.append(cliente_j)
-
-                        # **ML Policy: Reducir entrega pero asegurando que no haya stockout**
-                        if contexto.politica_reabastecimiento == "ML":
-                            xjt = solucion_prima.rutas[t].obtener_cantidad_entregada(cliente_j)
-                            y = min(xjt, min(solucion_prima.inventario_clientes[cliente_j.id][t:]))
-                            
-                            if y >= xjt:  
-                                solucion_nueva = solucion_prima.eliminar_visita(cliente_j, t)
-                            else:
-                                solucion_nueva = solucion_prima.quitar_cantidad_cliente(cliente_j, t, y)
-                                
-                            if solucion_nueva.es_admisible and solucion_nueva.costo() < solucion_prima.costo():
-                                solucion_prima = solucion_nueva.clonar()
-                                if not solucion_prima.rutas[t].es_visitado(cliente_j):
-                                    conjunto_A.append(cliente_j) 
-
-                # **ML Policy: Revisar si se puede almacenar en cliente**
-                if contexto.politica_reabastecimiento == "ML":
-                    for cliente_j in solucion_prima.rutas[t].clientes:
-                        if cliente_j.costo_almacenamiento < contexto.proveedor.costo_almacenamiento:
-                            # Obtener el nivel máximo proyectado en el futuro
-                            y = max(
-                                solucion_prima.inventario_clientes[cliente_j.id][t_futuro] +
-                                solucion_prima.rutas[t_futuro].obtener_cantidad_entregada(cliente_j)
-                                for t_futuro in range(t, contexto.horizonte_tiempo)
-                            )
-                            solucion_nueva = solucion_prima.agregar_cantidad_cliente(cliente_j, t, cliente_j.nivel_maximo - y)
-                            if solucion_nueva.costo() < solucion_prima.costo():
-                                solucion_prima = solucion_nueva.clonar()
+    unidades = _unidades_vecindario(solucion)
+    semillas = [random.getrandbits(64) for _ in unidades]
+    semilla_ajuste = random.getrandbits(64)
+    repetidos = {'antes_ajuste': 0, 'despues_ajuste': 0}
+
+    if contexto.procesos_vecindario > 1:
+        vecinos = vecindario_paralelo.crear_vecindario(solucion, unidades, semillas, semilla_ajuste, repetidos)
+    else:
+        vecinos = _evaluar_unidades(solucion, unidades, semillas, semilla_ajuste, repetidos)
+    try:
+        yield from _sin_repetidos(vecinos, repetidos)
+    finally:
+        contexto.estadisticas_vecindario.registrar(**repetidos)
+
+def _evaluar_unidades(
+    solucion: Solucion, unidades: list[tuple], semillas: list[int], semilla_ajuste: int, repetidos: dict
+) -> Iterator[Solucion]:
+    """
+    Genera en este proceso los vecinos de las unidades de trabajo, en orden. Al terminar (o al cerrarse el
+    generador) se restaura el estado de `random`, que en el pool sólo avanza al generar las semillas.
+    """
+    estado = random.getstate()
+    vistos_antes_ajuste = set()
+    try:
+        for unidad, semilla in zip(unidades, semillas):
+            yield from _evaluar_unidad(solucion, unidad, semilla, semilla_ajuste, vistos_antes_ajuste, repetidos)
+    finally:
+        random.setstate(estado)
+
+def _sin_repetidos(vecinos: Iterator[Solucion], repetidos: dict) -> Iterator[Solucion]:
+    """
+    Descarta los vecinos ajustados repetidos, recordando sólo sus hashes, y los cuenta en `repetidos`.
+    """
+    vistos = set()
+    try:
+        for vecino in vecinos:
+            if vecino._hash in vistos:
+                repetidos['despues_ajuste'] += 1
+                continue
+            vistos.add(vecino._hash)
+            yield vecino
+    finally:
+        vecinos.close()
+
+# Variantes de generación de N'(s), por nombre de unidad de trabajo
+VARIANTES = {
+    'eliminacion': lambda solucion, tiempo: _variante_eliminacion(solucion, [tiempo]),
+    'insercion': lambda solucion, cliente: _variante_insercion(solucion, [solucion.contexto.clientes[cliente]]),
+    'mover': lambda solucion, cliente: _variante_mover_visita(solucion, [solucion.contexto.clientes[cliente]]),
+    'intercambio': lambda solucion, cliente: _variante_intercambiar_visitas(solucion, [solucion.contexto.clientes[cliente]]),
+}
+
+def _unidades_vecindario(solucion: Solucion) -> list[tuple]:
+    """
+    Unidades de trabajo del vecindario: pares (variante, argumento), con argumento un tiempo para
+    la eliminación y el índice de un cliente para las demás variantes.
+    """
+    contexto = solucion.contexto
+    clientes = range(len(contexto.clientes))
+    return (
+        [('eliminacion', t) for t in range(contexto.horizonte_tiempo)] +
+        [(variante, i) for variante in ('insercion', 'mover', 'intercambio') for i in clientes]
+    )
+
+def _evaluar_unidad(
+    solucion: Solucion, unidad: tuple, semilla: int, semilla_ajuste: int, vistos: set, repetidos: dict
+) -> Iterator[Solucion]:
+    """
+    Genera la parte de N'(s) de una unidad de trabajo (paso 1) y ajusta cada vecino (paso 2), entregando
+    los vecinos a medida que se ajustan.
+
+    Los vecinos de N'(s) cuyo hash ya está en `vistos` se descartan antes del ajuste. Como el ajuste de
+    cada vecino usa una semilla que depende sólo de `semilla_ajuste` y de su contenido, un vecino repetido
+    se ajustaría igual que la primera vez, por lo que descartarlo no cambia el vecindario.
+
+    Args:
+        solucion (Solucion): Solución actual.
+        unidad (tuple): Par (variante, argumento).
+        semilla (int): Semilla de `random` para la generación de N'(s) de la unidad.
+        semilla_ajuste (int): Semilla de la iteración para el ajuste de los vecinos.
+        vistos (set): Hashes de los vecinos de N'(s) ya ajustados; se actualiza.
+        repetidos (dict): Conteo de repetidos; se incrementa 'antes_ajuste'.
+
+    Returns:
+        Iterator[Solucion]: Vecinos ajustados y admisibles.
+    """
+    random.seed(semilla)
+    variante, argumento = unidad
+    for solucion_prima in VARIANTES[variante](solucion, argumento):
+        if solucion_prima._hash in vistos:
+            repetidos['antes_ajuste'] += 1
+            continue
+        vistos.add(solucion_prima._hash)
+        random.seed(semilla_ajuste ^ solucion_prima._hash)
+        solucion_prima = _ajustar_vecino(solucion, solucion_prima)
+        if solucion_prima is not None:
+            yield solucion_prima
+
+def _ajustar_vecino(solucion: Solucion, solucion_prima: Solucion) -> Solucion:
+    """
+    Paso 2 de la construcción del vecindario: ajustes de un vecino según la política OU o ML sobre
+    los clientes cuyas visitas cambiaron respecto de la solución actual.
+
+    Returns:
+        Solucion: Vecino ajustado, o None si no es admisible o es igual a la solución actual.
+    """
+    contexto = solucion.contexto
+    conjunto_A = solucion_prima.clientes_cambiados(solucion)
+    while conjunto_A:
+        cliente_i = conjunto_A.pop(randint(0, len(conjunto_A) - 1))
+        for t in solucion_prima.tiempos_cliente(cliente_i):
+            for cliente_j in solucion_prima.rutas[t].clientes: 
+                if cliente_j.costo_almacenamiento > contexto.proveedor.costo_almacenamiento or \
+                   solucion_prima.rutas[t].obtener_total_entregado() > contexto.capacidad_vehiculo or \
+                   solucion_prima.inventario_proveedor[t] < 0:
+
+                    if contexto.politica_reabastecimiento == "OU":
+                        solucion_nueva = solucion_prima.eliminar_visita(cliente_j, t)                            
+                        if solucion_nueva.es_admisible and solucion_nueva.costo() < solucion_prima.costo():
+                           solucion_prima = solucion_nueva.clonar()
+                           conjunto_A.append(cliente_j)
+
+                    # **ML Policy: Reducir entrega pero asegurando que no haya stockout**
+                    if contexto.politica_reabastecimiento == "ML":
+                        xjt = solucion_prima.rutas[t].obtener_cantidad_entregada(cliente_j)
+                        y = min(xjt, int(solucion_prima.inventarios[cliente_j.indice, t:].min()))
+
+                        if y >= xjt:  
+                            solucion_nueva = solucion_prima.eliminar_visita(cliente_j, t)
+                        else:
+                            solucion_nueva = solucion_prima.quitar_cantidad_cliente(cliente_j, t, y)
+
+                        if solucion_nueva.es_admisible and solucion_nueva.costo() < solucion_prima.costo():
+                            solucion_prima = solucion_nueva.clonar()
+                            if not solucion_prima.rutas[t].es_visitado(cliente_j):
+                                conjunto_A.append(cliente_j) 
+
+            # **ML Policy: Revisar si se puede almacenar en cliente**
+            if contexto.politica_reabastecimiento == "ML":
+                for cliente_j in solucion_prima.rutas[t].clientes:
+                    if cliente_j.costo_almacenamiento < contexto.proveedor.costo_almacenamiento:
+                        # Obtener el nivel máximo proyectado en el futuro
+                        y = int(max(
+                            solucion_prima.inventarios[cliente_j.indice, t_futuro] +
+                            solucion_prima.rutas[t_futuro].obtener_cantidad_entregada(cliente_j)
+                            for t_futuro in range(t, contexto.horizonte_tiempo)
+                        ))
+                        solucion_nueva = solucion_prima.agregar_cantidad_cliente(cliente_j, t, cliente_j.nivel_maximo - y)
+                        if solucion_nueva.costo() < solucion_prima.costo():
+                            solucion_prima = solucion_nueva.clonar()
                                 
-        if solucion_prima.es_admisible and (not solucion_prima.es_igual(solucion)):
-            vecindario.append(solucion_prima)
-    return vecindario
+    if solucion_prima.es_admisible and (not solucion_prima.es_igual(solucion)):
+        return solucion_prima
+    return None
 
+def _seleccionar_movimientos(solucion: Solucion, tabulists) -> tuple[Solucion, Solucion]:
+    """
+    Selección del vecindario evaluado por diferencias: recorre los movimientos en orden de variación de costo
+    y construye, aplicándoles los ajustes del paso 2, sólo el mejor vecino permitido y el mejor no permitido
+    por las listas tabú.
 
-def _variante_eliminacion(solucion: Solucion) -> list[Solucion]:
+    Returns:
+        tuple[Solucion, Solucion]: Mejor vecino permitido y mejor vecino no permitido (None si no existen).
+    """
+    mejores = {True: None, False: None}
+    for movimiento_vecino in sorted(generar_movimientos(solucion), key=lambda m: m.delta):
+        permitido = tabulists.cambios_permitidos(movimiento_vecino.visitas_removidas(), movimiento_vecino.visitas_agregadas(solucion))
+        if mejores[permitido] is None:
+            mejores[permitido] = _ajustar_vecino(solucion, movimiento_vecino.aplicar(solucion))
+            if (mejores[True] is not None) and (mejores[False] is not None):
+                break
+    return mejores[True], mejores[False]
+
+
+def _variante_eliminacion(solucion: Solucion, tiempos: list[int] = None) -> list[Solucion]:
     """
     Genera soluciones eliminando visitas de clientes en la solución actual, diferenciando entre ML y OU.
+    Si se indican tiempos, sólo se eliminan visitas de esos tiempos.
     """
     vecindario_prima = []
-    for t, ruta in enumerate(solucion.rutas):
-        for cliente in ruta.clientes:
+    for t in (tiempos if tiempos is not None else range(len(solucion.rutas))):
+        for cliente in solucion.rutas[t].clientes:
             nueva_solucion = solucion.eliminar_visita(cliente, t)
             if nueva_solucion.es_admisible:
                 vecindario_prima.append(nueva_solucion)
-    return set(vecindario_prima)
+    return vecindario_prima
 
-def _variante_insercion(solucion: Solucion) -> list[Solucion]:
+def _variante_insercion(solucion: Solucion, clientes: list = None) -> list[Solucion]:
     """
     Genera soluciones insertando nuevas visitas a clientes en la solución actual, respetando las políticas ML y OU.
+    Si se indican clientes, sólo se insertan visitas de esos clientes.
     """ 
     vecindario_prima = []
     contexto = solucion.contexto
-    for cliente in contexto.clientes:
+    for cliente in (clientes if clientes is not None else contexto.clientes):
         for t in set(range(solucion.contexto.horizonte_tiempo)) - set(solucion.tiempos_cliente(cliente)):   
             nueva_solucion = solucion.insertar_visita(cliente, t)
             if nueva_solucion.es_admisible:
                 vecindario_prima.append(nueva_solucion)        
-    return set(vecindario_prima)
+    return vecindario_prima
 
 
-def _variante_mover_visita(solucion: Solucion) -> list[Solucion]:
+def _variante_mover_visita(solucion: Solucion, clientes: list = None) -> list[Solucion]:
     """
     Genera soluciones moviendo visitas de un cliente entre diferentes tiempos de entrega, 
-    diferenciando entre ML y OU.
+    diferenciando entre ML y OU. Si se indican clientes, sólo se mueven visitas de esos clientes.
+    Los destinos se limitan según las listas de candidatos (ver `Solucion.tiempos_destino`).
     """
     vecindario_prima = []
     contexto = solucion.contexto
     
-    for cliente in contexto.clientes:
+    for cliente in (clientes if clientes is not None else contexto.clientes):
         tiempos_cliente_actual = solucion.tiempos_cliente(cliente)
-        posibles_destinos = set(range(contexto.horizonte_tiempo)) - set(tiempos_cliente_actual)
-        for t_destino in posibles_destinos:
+        for t_destino in solucion.tiempos_destino(cliente):
             solucion_intermedia = solucion.insertar_visita(cliente, t_destino)
             for t_origen in tiempos_cliente_actual:
                 nueva_solucion = solucion_intermedia.eliminar_visita(cliente, t_origen)
@@ -164,18 +345,21 @@ def _variante_mover_visita(solucion: Solucion) -> list[Solucion]:
     return vecindario_prima
 
 
-def _variante_intercambiar_visitas(solucion: Solucion) -> list[Solucion]:
+def _variante_intercambiar_visitas(solucion: Solucion, clientes_origen: list = None) -> list[Solucion]:
     """
     Genera soluciones intercambiando visitas entre dos clientes en diferentes tiempos de entrega,
     asegurando que la solución siga siendo admisible y cumpla con las políticas de OU y ML.
+    Si se indican clientes de origen, sólo se consideran intercambios en los que el primer cliente es uno de ellos.
+    Sólo se intercambian pares de clientes candidatos (vecindario granular, `candidatos_k` en la configuración).
     """
     vecindario_prima = []
     clientes = solucion.contexto.clientes
+    candidatos = solucion.contexto.matriz_candidatos
 
-    for cliente1 in clientes:
+    for cliente1 in (clientes_origen if clientes_origen is not None else clientes):
         for cliente2 in clientes:
-            if cliente1 == cliente2:
-                continue  # No intercambiar un cliente consigo mismo
+            if not candidatos[cliente1.indice, cliente2.indice]:
+                continue  # No intercambiar un cliente consigo mismo ni con un cliente fuera de su lista de candidatos
 
             tiempos1 = set(solucion.tiempos_cliente(cliente1))
             tiempos2 = set(solucion.tiempos_cliente(cliente2))
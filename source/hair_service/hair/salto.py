@@ -25,16 +25,17 @@ def salto(solucion, iterador_principal, triplets) -> Solucion:
             tiempos_cliente_modificado.append(tiempo_no_visitado)  # Agregar en el nuevo tiempo
 
             # Reconstrucción total de las rutas
-            nueva_solucion = Solucion(rutas=tuple(Ruta(tuple([]), tuple([])) for _ in solucion.rutas))
+            borrador = Solucion(rutas=tuple(Ruta(tuple([]), tuple([])) for _ in solucion.rutas)).editar()
             for c in solucion.contexto.clientes:
                 for t in range(solucion.contexto.horizonte_tiempo):
-                    if (t in tiempos_cliente_modificado) and (c not in nueva_solucion.rutas[t].clientes):
-                        nueva_solucion = nueva_solucion.insertar_visita(c, t)  
-                    if (t not in tiempos_cliente_modificado) and (c in nueva_solucion.rutas[t].clientes):
-                        nueva_solucion = nueva_solucion.eliminar_visita(c, t)  
+                    if (t in tiempos_cliente_modificado) and (c not in borrador.rutas[t].clientes):
+                        borrador.insertar_visita(c, t)  
+                    if (t not in tiempos_cliente_modificado) and (c in borrador.rutas[t].clientes):
+                        borrador.eliminar_visita(c, t)  
                     
-                    if nueva_solucion.rutas[t].obtener_cantidad_entregada(c):
-                        nueva_solucion = nueva_solucion.eliminar_visita(c, t)
+                    if borrador.rutas[t].obtener_cantidad_entregada(c):
+                        borrador.eliminar_visita(c, t)
+            nueva_solucion = borrador.confirmar()
                     
             # Verificar si la nueva solución es admisible
             if nueva_solucion.es_admisible:
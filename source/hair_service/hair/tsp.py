@@ -0,0 +1,249 @@
+"""
+Optimización del recorrido de una ruta (TSP con el proveedor como origen y destino).
+
+El optimizador nativo trabaja sobre la submatriz de distancias de la ruta, con el proveedor en la fila 0:
+- Held-Karp (programación dinámica exacta sobre subconjuntos) para rutas de hasta `tsp_exacto_max` clientes.
+- 2-opt y Or-opt (segmentos de 1 a 3 clientes, en ambos sentidos) con mejor mejora, partiendo del
+  recorrido del vecino más cercano, para rutas más largas. Se detiene tras `tsp_movimientos_max`
+  movimientos o pasados `tsp_limite_ms` milisegundos. Con los merges de la mejora en el pool (`procesos`
+  > 1 en [Mejora]) sólo se limita por movimientos, para que el recorrido no dependa de la carga de cada
+  proceso.
+
+El ruteo de OR-Tools se mantiene como backend opcional (`backend = ortools` en la sección [TSP]).
+
+Los recorridos optimizados se guardan en la caché de recorridos del contexto (`CacheRecorridos`), por
+conjunto de clientes, de modo que una ruta que vuelve a aparecer no se optimiza otra vez. La optimización
+parte siempre de los clientes ordenados por índice, por lo que el recorrido guardado depende sólo del
+conjunto y no del orden de la ruta ni de qué proceso lo calculó primero.
+"""
+import time
+import numpy as np
+from modelos.contexto_file import contexto_ejecucion
+from modelos.ruta import Ruta
+
+# Largos de los segmentos que mueve Or-opt
+LARGOS_OR_OPT = (1, 2, 3)
+
+def optimizar_ruta(ruta: Ruta) -> Ruta:
+    """
+    Reordena los clientes de una ruta para reducir el costo del recorrido. Primero consulta la caché de
+    recorridos del contexto por el conjunto de clientes; si no lo conoce, lo optimiza con el backend
+    configurado y guarda el resultado.
+
+    Args:
+        ruta (Ruta): Ruta a optimizar.
+
+    Returns:
+        Ruta: Ruta con el nuevo orden y las mismas cantidades por cliente, o la misma ruta si no mejora.
+    """
+    # Con dos clientes o menos todos los órdenes tienen el mismo costo (distancias simétricas)
+    if len(ruta.clientes) < 3:
+        return ruta
+
+    contexto = contexto_ejecucion.get()
+    recorrido = contexto.cache_recorridos.obtener(frozenset(cliente.indice for cliente in ruta.clientes))
+    if recorrido is None:
+        recorrido = _optimizar_recorrido(contexto, ruta)
+        contexto.cache_recorridos.guardar(*recorrido)
+
+    orden, costo = recorrido
+    if costo >= ruta.costo:
+        return ruta
+    posiciones = {cliente.indice: posicion for posicion, cliente in enumerate(ruta.clientes)}
+    return Ruta(
+        tuple(contexto.clientes[indice] for indice in orden),
+        tuple(ruta.cantidades[posiciones[indice]] for indice in orden),
+        costo=costo
+    )
+
+def _optimizar_recorrido(contexto, ruta: Ruta) -> tuple[tuple[int, ...], float]:
+    """
+    Optimiza el recorrido de los clientes de la ruta con el backend configurado, partiendo de los
+    clientes ordenados por índice.
+
+    Returns:
+        tuple: (orden, costo) del recorrido optimizado, con el orden como tupla de índices de clientes.
+    """
+    clientes = sorted(cliente.indice for cliente in ruta.clientes)
+    nodos = [0] + [indice + 1 for indice in clientes]
+    matriz = contexto.matriz_distancia[np.ix_(nodos, nodos)]
+    if contexto.tsp_backend == 'ortools':
+        orden = resolver_ortools(matriz, contexto.tsp_limite_ms)
+    elif len(clientes) <= contexto.tsp_exacto_max:
+        orden = held_karp(matriz)
+    else:
+        limite_ms = contexto.tsp_limite_ms if contexto.procesos_mejora == 1 else None
+        orden = busqueda_local(matriz, vecino_mas_cercano(matriz), contexto.tsp_movimientos_max, limite_ms)
+
+    if orden is None:
+        orden = list(range(1, len(nodos)))
+    return tuple(clientes[k - 1] for k in orden), float(matriz[[0] + orden, orden + [0]].sum())
+
+def held_karp(matriz: np.ndarray) -> list[int]:
+    """
+    Resuelve el TSP de forma exacta por programación dinámica sobre subconjuntos, vectorizada por tamaño
+    de subconjunto. costo[S, k] es el menor costo de salir del proveedor, visitar los clientes de S y
+    terminar en k (con k en S).
+
+    Args:
+        matriz (np.ndarray): Distancias entre el proveedor (0) y los clientes (1..n).
+
+    Returns:
+        list[int]: Orden óptimo de visita de los clientes (índices 1..n de la matriz).
+    """
+    n = len(matriz) - 1
+    distancias = matriz[1:, 1:].astype(float)
+    bits = 1 << np.arange(n)
+    subconjuntos = np.arange(1 << n)
+    tamanos = ((subconjuntos[:, None] & bits) > 0).sum(axis=1)
+
+    costo = np.full((1 << n, n), np.inf)
+    padre = np.full((1 << n, n), -1)
+    costo[bits, np.arange(n)] = matriz[0, 1:]
+    for tamano in range(2, n + 1):
+        S = subconjuntos[tamanos == tamano]
+        # valores[s, k, j]: llegar a k desde j, habiendo visitado S sin k y terminado en j
+        valores = costo[S[:, None] ^ bits] + distancias.T
+        # Si k no está en S, S ^ bit es un subconjunto más grande, todavía sin calcular (infinito)
+        padre[S] = valores.argmin(axis=2)
+        costo[S] = np.take_along_axis(valores, padre[S][..., None], axis=2)[..., 0]
+
+    S, k = (1 << n) - 1, int((costo[-1] + matriz[1:, 0]).argmin())
+    orden = []
+    while k >= 0:
+        orden.append(k + 1)
+        S, k = S ^ (1 << k), int(padre[S, k])
+    return orden[::-1]
+
+def vecino_mas_cercano(matriz: np.ndarray) -> list[int]:
+    """
+    Construye un recorrido desde el proveedor yendo siempre al cliente más cercano no visitado (el de menor
+    índice, ante empates).
+
+    Returns:
+        list[int]: Orden de visita de los clientes (índices 1..n de la matriz).
+    """
+    pendientes = np.ones(len(matriz), dtype=bool)
+    pendientes[0] = False
+    orden, actual = [], 0
+    for _ in range(len(matriz) - 1):
+        actual = int(np.where(pendientes, matriz[actual], np.inf).argmin())
+        pendientes[actual] = False
+        orden.append(actual)
+    return orden
+
+def busqueda_local(
+    matriz: np.ndarray, orden: list[int], movimientos_max: int, limite_ms: float = None
+) -> list[int]:
+    """
+    Mejora un recorrido con 2-opt y Or-opt, aplicando en cada paso el mejor movimiento de 2-opt o, si no
+    hay ninguno que mejore, el mejor de Or-opt, hasta un óptimo local o agotar los límites.
+
+    Args:
+        matriz (np.ndarray): Distancias entre el proveedor (0) y los clientes (1..n).
+        orden (list[int]): Orden inicial de visita de los clientes.
+        movimientos_max (int): Cantidad máxima de movimientos aplicados.
+        limite_ms (float): Tiempo máximo en milisegundos (None: sin límite de tiempo, y el resultado sólo
+            depende de la matriz y del orden inicial).
+
+    Returns:
+        list[int]: Orden de visita mejorado.
+    """
+    limite = None if limite_ms is None else time.perf_counter() + limite_ms / 1000
+    recorrido = [0] + orden + [0]
+    for _ in range(movimientos_max):
+        if limite is not None and time.perf_counter() >= limite:
+            break
+        nuevo = _mejor_2opt(matriz, recorrido) or _mejor_or_opt(matriz, recorrido)
+        if nuevo is None:
+            break
+        recorrido = nuevo
+    return recorrido[1:-1]
+
+def _mejor_2opt(matriz: np.ndarray, recorrido: list[int]) -> list[int]:
+    """
+    Aplica la inversión del tramo recorrido[i..j] de mayor ahorro, o devuelve None si ninguna mejora.
+    """
+    p = np.array(recorrido)
+    anteriores, actuales, siguientes = p[:-2], p[1:-1], p[2:]
+    # delta[i, j]: reemplazar las aristas (anterior_i, actual_i) y (actual_j, siguiente_j)
+    # por (anterior_i, actual_j) y (actual_i, siguiente_j)
+    delta = (
+        matriz[anteriores[:, None], actuales[None, :]] + matriz[actuales[:, None], siguientes[None, :]]
+        - matriz[anteriores, actuales][:, None] - matriz[actuales, siguientes][None, :]
+    )
+    delta[np.tril_indices(len(actuales))] = 0
+    i, j = np.unravel_index(delta.argmin(), delta.shape)
+    if delta[i, j] >= 0:
+        return None
+    return recorrido[:i + 1] + recorrido[i + 1:j + 2][::-1] + recorrido[j + 2:]
+
+def _mejor_or_opt(matriz: np.ndarray, recorrido: list[int]) -> list[int]:
+    """
+    Aplica el traslado de segmento (de largo LARGOS_OR_OPT, directo o invertido) de mayor ahorro, o
+    devuelve None si ninguno mejora.
+    """
+    p = np.array(recorrido)
+    n = len(p) - 2
+    # Aristas (p[e], p[e + 1]) donde se puede insertar un segmento
+    origenes, destinos = p[:-1], p[1:]
+    costo_aristas = matriz[origenes, destinos]
+    mejor = (0, None)
+    for largo in LARGOS_OR_OPT:
+        if largo >= n:
+            break
+        inicios = np.arange(1, n - largo + 2)
+        primeros, ultimos = p[inicios], p[inicios + largo - 1]
+        anteriores, siguientes = p[inicios - 1], p[inicios + largo]
+        ahorro = matriz[anteriores, primeros] + matriz[ultimos, siguientes] - matriz[anteriores, siguientes]
+        for invertido, (entrada, salida) in enumerate(((primeros, ultimos), (ultimos, primeros))):
+            delta = (
+                matriz[origenes[None, :], entrada[:, None]] + matriz[salida[:, None], destinos[None, :]]
+                - costo_aristas[None, :] - ahorro[:, None]
+            ).astype(float)
+            # Las aristas que tocan al segmento (de inicio - 1 a inicio + largo - 1) no son destinos válidos
+            aristas = np.arange(n + 1)
+            delta[(aristas[None, :] >= inicios[:, None] - 1) & (aristas[None, :] <= inicios[:, None] + largo - 1)] = np.inf
+            s, e = np.unravel_index(delta.argmin(), delta.shape)
+            if delta[s, e] < mejor[0]:
+                mejor = (delta[s, e], (int(inicios[s]), largo, int(e), bool(invertido)))
+
+    if mejor[1] is None:
+        return None
+    inicio, largo, arista, invertido = mejor[1]
+    segmento = recorrido[inicio:inicio + largo]
+    if invertido:
+        segmento = segmento[::-1]
+    resto = recorrido[:inicio] + recorrido[inicio + largo:]
+    posicion = arista + 1 if arista < inicio else arista - largo + 1
+    return resto[:posicion] + segmento + resto[posicion:]
+
+def resolver_ortools(matriz: np.ndarray, limite_ms: float) -> list[int]:
+    """
+    Resuelve el TSP con el ruteo de OR-Tools (PATH_CHEAPEST_ARC y búsqueda local hasta el límite de tiempo).
+
+    Returns:
+        list[int]: Orden de visita de los clientes, o None si OR-Tools no encuentra solución.
+    """
+    from ortools.constraint_solver import routing_enums_pb2, pywrapcp
+
+    distancias = matriz.tolist()
+    manager = pywrapcp.RoutingIndexManager(len(distancias), 1, 0)
+    routing = pywrapcp.RoutingModel(manager)
+
+    def distance_callback(from_index, to_index):
+        return distancias[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)]
+
+    routing.SetArcCostEvaluatorOfAllVehicles(routing.RegisterTransitCallback(distance_callback))
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    search_parameters.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    search_parameters.time_limit.FromMilliseconds(int(limite_ms))
+
+    solution = routing.SolveWithParameters(search_parameters)
+    if not solution:
+        return None
+    orden, index = [], solution.Value(routing.NextVar(routing.Start(0)))
+    while not routing.IsEnd(index):
+        orden.append(manager.IndexToNode(index))
+        index = solution.Value(routing.NextVar(index))
+    return orden
@@ -0,0 +1,237 @@
+"""
+Evaluación del vecindario completo, y de los merges de rutas de `mejora()`, repartida en un pool de procesos.
+
+Los datos estáticos de la instancia (matriz de distancias y vectores de los clientes) se copian una única
+vez a memoria compartida, y cada proceso recibe el resto del contexto al iniciarse. Por cada lote de
+unidades de trabajo sólo se envían las rutas de la solución actual (índices de clientes y cantidades),
+los factores de penalización vigentes y las semillas; cada proceso devuelve, por vecino, las rutas que
+cambiaron respecto de la solución actual.
+
+Los pools pertenecen a la ejecución: se guardan en `contexto.pools_vecindario`, uno por cantidad de
+procesos (el vecindario y los merges comparten el pool cuando usan la misma cantidad), y se cierran con
+`cerrar_pools(contexto)` al terminar la ejecución. Así las ejecuciones concurrentes del servicio no
+comparten ni cierran pools ajenos. Al salir del intérprete se cierran los que hayan quedado abiertos.
+"""
+import atexit
+import numpy as np
+from typing import Iterator
+from multiprocessing import Pool, shared_memory
+from modelos.contexto import Contexto
+from modelos.contexto_file import contexto_ejecucion
+from modelos.gestores import EstadisticasVecindario, TablaTransposicion, CacheRecorridos
+from modelos.solucion import Solucion
+from modelos.ruta import Ruta
+
+# Atributos del contexto que se comparten por memoria compartida
+ATRIBUTOS_COMPARTIDOS = (
+    'matriz_distancia', 'niveles_iniciales', 'niveles_maximos', 'niveles_minimos', 'demandas', 'costos_almacenamiento',
+    'matriz_candidatos'
+)
+
+# Atributos del contexto propios de cada proceso, que no se copian al pool
+ATRIBUTOS_LOCALES = (
+    'tabla_transposicion', 'estadisticas_vecindario', 'cache_recorridos', 'pools_vecindario', 'modelos_mip'
+)
+
+class PoolVecindario:
+    """
+    Pool de procesos asociado a un contexto, con sus datos estáticos en memoria compartida.
+    """
+
+    def __init__(self, contexto: Contexto, procesos: int) -> None:
+        self.contexto = contexto
+        self.procesos = procesos
+        self.memorias = []
+        descriptores = {}
+        for atributo in ATRIBUTOS_COMPARTIDOS:
+            arreglo = getattr(contexto, atributo)
+            memoria = shared_memory.SharedMemory(create=True, size=max(1, arreglo.nbytes))
+            np.ndarray(arreglo.shape, dtype=arreglo.dtype, buffer=memoria.buf)[...] = arreglo
+            self.memorias.append(memoria)
+            descriptores[atributo] = (memoria.name, arreglo.shape, arreglo.dtype.str)
+
+        estado = {
+            atributo: valor for atributo, valor in vars(contexto).items()
+            if atributo not in ATRIBUTOS_COMPARTIDOS + ATRIBUTOS_LOCALES
+        }
+        memoria_tabla = contexto.tabla_transposicion.memoria_maxima
+        self.pool = Pool(procesos, initializer=_inicializar_proceso, initargs=(estado, descriptores, memoria_tabla))
+
+    def cerrar(self) -> None:
+        self.pool.close()
+        self.pool.join()
+        for memoria in self.memorias:
+            memoria.close()
+            memoria.unlink()
+
+# Pools abiertos de todas las ejecuciones, para cerrarlos al salir si alguna no lo hizo
+_pools_abiertos = set()
+
+def obtener_pool(contexto: Contexto, procesos: int) -> PoolVecindario:
+    """
+    Devuelve el pool del contexto con la cantidad de procesos pedida, creándolo si hace falta.
+    """
+    if procesos not in contexto.pools_vecindario:
+        pool = PoolVecindario(contexto, procesos)
+        contexto.pools_vecindario[procesos] = pool
+        _pools_abiertos.add(pool)
+    return contexto.pools_vecindario[procesos]
+
+def cerrar_pools(contexto: Contexto) -> None:
+    """
+    Cierra los pools del contexto y libera su memoria compartida.
+    """
+    for pool in contexto.pools_vecindario.values():
+        pool.cerrar()
+        _pools_abiertos.discard(pool)
+    contexto.pools_vecindario.clear()
+
+@atexit.register
+def _cerrar_pools_abiertos() -> None:
+    for pool in list(_pools_abiertos):
+        pool.cerrar()
+    _pools_abiertos.clear()
+
+def crear_vecindario(
+    solucion: Solucion, unidades: list[tuple], semillas: list[int], semilla_ajuste: int, repetidos: dict
+) -> Iterator[Solucion]:
+    """
+    Evalúa las unidades de trabajo del vecindario en el pool y genera los vecinos en el proceso principal,
+    en el mismo orden que si se evaluaran secuencialmente. Los lotes se reciben a medida que terminan, por lo
+    que en memoria sólo hay, como rutas compactas, los vecinos de los lotes aún no consumidos.
+
+    Args:
+        solucion (Solucion): Solución actual.
+        unidades (list[tuple]): Unidades de trabajo (variante, argumento).
+        semillas (list[int]): Semilla de cada unidad.
+        semilla_ajuste (int): Semilla de la iteración para el ajuste de los vecinos.
+        repetidos (dict): Conteo de repetidos; se incrementa 'antes_ajuste' con los descartados en cada lote.
+
+    Returns:
+        Iterator[Solucion]: Vecinos ajustados y admisibles.
+    """
+    contexto = solucion.contexto
+    pool = obtener_pool(contexto, contexto.procesos_vecindario)
+    rutas = _rutas_compactas(solucion)
+    penalizaciones = (contexto.alfa.obtener_valor(), contexto.beta.obtener_valor())
+
+    trabajos = list(zip(unidades, semillas))
+    tamano_lote = max(1, -(-len(trabajos) // (4 * pool.procesos)))
+    lotes = [trabajos[i:i + tamano_lote] for i in range(0, len(trabajos), tamano_lote)]
+    resultados = pool.pool.imap(_evaluar_lote, [(rutas, penalizaciones, semilla_ajuste, lote) for lote in lotes])
+
+    for resultado, repetidos_lote in resultados:
+        repetidos['antes_ajuste'] += repetidos_lote
+        for vecinos in resultado:
+            for rutas_modificadas in vecinos:
+                borrador = solucion.editar()
+                for t, indices, cantidades in rutas_modificadas:
+                    borrador.establecer_ruta(t, Ruta(tuple(contexto.clientes[i] for i in indices), cantidades))
+                yield borrador.confirmar()
+
+def evaluar_merges(solucion: Solucion, candidatos: list[tuple], semillas: list[int]) -> list[Solucion]:
+    """
+    Evalúa en el pool los merges de rutas de la segunda mejora de `mejora()`, uno por tarea.
+
+    Args:
+        solucion (Solucion): Solución a partir de la que se hacen los merges.
+        candidatos (list[tuple]): Merges (ruta principal, ruta secundaria, ruta de intercambio).
+        semillas (list[int]): Semilla de cada merge.
+
+    Returns:
+        list[Solucion]: Resultado de cada merge, en el orden de los candidatos (None si MIP2 no lo acepta).
+    """
+    contexto = solucion.contexto
+    pool = obtener_pool(contexto, contexto.procesos_mejora)
+    rutas = _rutas_compactas(solucion)
+    penalizaciones = (contexto.alfa.obtener_valor(), contexto.beta.obtener_valor())
+    resultados = pool.pool.map(
+        _evaluar_merge, [(rutas, penalizaciones, candidato, semilla) for candidato, semilla in zip(candidatos, semillas)],
+        chunksize=1
+    )
+    return [
+        None if resultado is None else Solucion(tuple(
+            Ruta(tuple(contexto.clientes[i] for i in indices), cantidades) for indices, cantidades in resultado
+        ))
+        for resultado in resultados
+    ]
+
+def _rutas_compactas(solucion: Solucion) -> tuple:
+    """
+    Rutas de la solución como (índices de clientes, cantidades), para enviarlas al pool.
+    """
+    return tuple((tuple(cliente.indice for cliente in ruta.clientes), ruta.cantidades) for ruta in solucion.rutas)
+
+def _inicializar_proceso(estado: dict, descriptores: dict, memoria_tabla: int) -> None:
+    """
+    Reconstruye el contexto en un proceso del pool, con los arreglos estáticos sobre la memoria compartida
+    y una tabla de transposición (con su caché de recorridos) y modelos MIP propios.
+    """
+    global _memorias_proceso
+    contexto = Contexto.__new__(Contexto)
+    contexto.__dict__.update(estado)
+    contexto.tabla_transposicion = TablaTransposicion(memoria_tabla)
+    contexto.estadisticas_vecindario = EstadisticasVecindario()
+    contexto.pools_vecindario = {}
+    contexto.modelos_mip = None
+    contexto.cache_recorridos = CacheRecorridos(
+        contexto.tabla_transposicion, contexto.archivo_cache_recorridos, contexto.huella_instancia
+    )
+    _memorias_proceso = []
+    for atributo, (nombre, forma, tipo) in descriptores.items():
+        # Los procesos del pool comparten el resource_tracker del principal, que es quien libera la memoria
+        memoria = shared_memory.SharedMemory(name=nombre)
+        _memorias_proceso.append(memoria)
+        setattr(contexto, atributo, np.ndarray(forma, dtype=np.dtype(tipo), buffer=memoria.buf))
+    contexto_ejecucion.set(contexto)
+
+def _evaluar_lote(argumentos: tuple) -> tuple[list[list[tuple]], int]:
+    """
+    Evalúa un lote de unidades de trabajo en un proceso del pool. Recibe las rutas de la solución actual,
+    los factores de penalización, la semilla de ajuste y el lote de pares (unidad, semilla). Los repetidos
+    antes del ajuste se descartan dentro del lote.
+
+    Returns:
+        tuple[list[list[tuple]], int]: Por unidad, los vecinos como tuplas de rutas modificadas (tiempo,
+        índices de clientes, cantidades), y la cantidad de repetidos descartados antes del ajuste.
+    """
+    from hair.movimiento import _evaluar_unidad
+
+    rutas, penalizaciones, semilla_ajuste, lote = argumentos
+    contexto = contexto_ejecucion.get()
+    contexto.alfa.value, contexto.beta.value = penalizaciones
+    solucion = Solucion(tuple(
+        Ruta(tuple(contexto.clientes[i] for i in indices), cantidades) for indices, cantidades in rutas
+    ))
+
+    resultados = []
+    vistos = set()
+    repetidos = {'antes_ajuste': 0}
+    for unidad, semilla in lote:
+        resultados.append([
+            tuple(
+                (t, tuple(cliente.indice for cliente in ruta.clientes), ruta.cantidades)
+                for t, ruta in enumerate(vecino.rutas) if not ruta.es_igual(solucion.rutas[t])
+            )
+            for vecino in _evaluar_unidad(solucion, unidad, semilla, semilla_ajuste, vistos, repetidos)
+        ])
+    return resultados, repetidos['antes_ajuste']
+
+def _evaluar_merge(argumentos: tuple) -> tuple:
+    """
+    Evalúa un merge de rutas en un proceso del pool. Recibe las rutas de la solución, los factores de
+    penalización, el candidato y su semilla.
+
+    Returns:
+        tuple: Rutas del resultado como (índices de clientes, cantidades), o None si MIP2 no lo acepta.
+    """
+    from hair.mejora import evaluar_merge
+
+    rutas, penalizaciones, candidato, semilla = argumentos
+    contexto = contexto_ejecucion.get()
+    contexto.alfa.value, contexto.beta.value = penalizaciones
+    solucion = Solucion(tuple(
+        Ruta(tuple(contexto.clientes[i] for i in indices), cantidades) for indices, cantidades in rutas
+    ))
+    resultado = evaluar_merge(solucion, *candidato, semilla)
+    return None if resultado is None else _rutas_compactas(resultado)
@@ -1,12 +1,17 @@
-import math
+import hashlib
+import random
 import configparser
+import numpy as np
 from modelos.entidad import Cliente, Proveedor
-from modelos.gestores import FactorPenalizacion
+from modelos.gestores import FactorPenalizacion, EstadisticasVecindario, TablaTransposicion, CacheRecorridos
 class Contexto:
     """
     Representa el contexto de la solución incluyendo parámetros de configuración, proveedor, 
     clientes y la matriz de distancias entre ellos.
 
+    La matriz de distancias es densa: la fila/columna 0 corresponde al proveedor y la
+    fila/columna `cliente.indice + 1` a cada cliente.
+
     Args:
         horizonte_tiempo (int): Horizonte temporal de la simulación.
         capacidad_vehiculo (float): Capacidad máxima del vehículo.
@@ -33,6 +38,29 @@ class Contexto:
         self.politica_reabastecimiento = politica_reabastecimiento
         self.taboo_len          = 10
         self.lambda_ttl         = float(config['Taboo']['lambda_ttl'])
+        self.evaluacion_vecindario = config['Movimiento']['evaluacion']
+        self.procesos_vecindario   = int(config['Movimiento']['procesos'])
+        self.pools_vecindario      = {}
+        self.exploracion_vecindario = config['Movimiento']['exploracion']
+        self.presupuesto_vecindario = int(config['Movimiento']['presupuesto'])
+        self.limite_ms_vecindario  = float(config['Movimiento']['limite_ms'])
+        self.diversificacion_k     = int(config['Movimiento']['diversificacion_k'])
+        self.estadisticas_vecindario = EstadisticasVecindario()
+        self.tabla_transposicion   = TablaTransposicion(int(float(config['Transposicion']['memoria_mb']) * 2**20))
+        # Modelos MIP1 y MIP2 persistentes de la ejecución (GestorModelosMIP), creados al primer uso
+        self.modelos_mip           = None
+        self.candidatos_k          = int(config['Movimiento']['candidatos_k'])
+        self.candidatos_mover      = config['Movimiento'].getboolean('candidatos_mover')
+        self.tsp_backend           = config['TSP']['backend']
+        self.tsp_exacto_max        = int(config['TSP']['exacto_max'])
+        self.tsp_limite_ms         = float(config['TSP']['limite_ms'])
+        self.tsp_movimientos_max   = int(config['TSP']['movimientos_max'])
+        self.archivo_cache_recorridos = config['TSP']['cache_disco'] or None
+        self.mip_backend           = config['MIP']['backend']
+        self.mip_limite_ms         = float(config['MIP']['limite_ms'])
+        self.mip_gap               = float(config['MIP']['gap'])
+        self.mip_hint              = config['MIP'].getboolean('hint')
+        self.procesos_mejora       = int(config['Mejora']['procesos'])
         self.penalty_min_limit  = 100
         self.penalty_max_limit  = float("inf")
         self.capacidad_vehiculo = capacidad_vehiculo
@@ -52,9 +80,18 @@ class Contexto:
             proveedor.costo_almacenamiento
         )
 
+        coordenadas = np.array(
+            [(self.proveedor.coord_x, self.proveedor.coord_y)] + [(c.coord_x, c.coord_y) for c in clientes],
+            dtype=np.float64
+        ).reshape(-1, 2)
+        self.matriz_distancia = self.calcular_matriz_distancia(coordenadas)
+        # Huella de la instancia, que identifica sus recorridos en la caché en disco
+        self.huella_instancia = hashlib.sha1(self.matriz_distancia.tobytes()).hexdigest()
+        self.cache_recorridos = CacheRecorridos(self.tabla_transposicion, self.archivo_cache_recorridos, self.huella_instancia)
+
         self.clientes = []
-        for c in clientes:
-            distancia_proveedor = self.calcular_distancia(self.proveedor.coord_x, c.coord_x, self.proveedor.coord_y, c.coord_y)
+        for indice, c in enumerate(clientes):
+            distancia_proveedor = int(self.matriz_distancia[0, indice + 1])
             self.clientes.append(Cliente(
                 c.id,
                 c.coord_x,
@@ -64,32 +101,68 @@ class Contexto:
                 c.nivel_minimo,
                 c.nivel_demanda,
                 c.costo_almacenamiento,
-                distancia_proveedor
+                distancia_proveedor,
+                indice
             ))
 
-        self.matriz_distancia = {
-            cliente.id: {
-                otro_cliente.id: self.calcular_distancia(
-                    cliente.coord_x, otro_cliente.coord_x,
-                    cliente.coord_y, otro_cliente.coord_y
-                )
-                for otro_cliente in self.clientes
-            }
-            for cliente in self.clientes
-        }
+        # Parámetros de los clientes como vectores, indexados por cliente.indice
+        self.niveles_iniciales      = np.array([c.nivel_almacenamiento for c in self.clientes], dtype=np.int64)
+        self.niveles_maximos        = np.array([c.nivel_maximo for c in self.clientes], dtype=np.int64)
+        self.niveles_minimos        = np.array([c.nivel_minimo for c in self.clientes], dtype=np.int64)
+        self.demandas               = np.array([c.nivel_demanda for c in self.clientes], dtype=np.int64)
+        self.costos_almacenamiento  = np.array([c.costo_almacenamiento for c in self.clientes], dtype=np.float64)
 
+        # Vecindarios granulares: matriz simétrica n x n que indica qué pares de clientes son candidatos
+        self.matriz_candidatos = self.calcular_matriz_candidatos(self.candidatos_k)
 
-    def calcular_distancia(self, xi, xj, yi, yj):
+        # Claves aleatorias de 64 bits por (cliente, tiempo) para el hash incremental de las soluciones.
+        # Se generan con una semilla fija y un generador propio, para no alterar la secuencia de `random`.
+        generador = random.Random(0)
+        self.claves_hash = [
+            [generador.getrandbits(64) for _ in range(horizonte_tiempo)] for _ in self.clientes
+        ]
+
+    @staticmethod
+    def calcular_matriz_distancia(coordenadas: np.ndarray) -> np.ndarray:
         """
-        Calcula la distancia euclidiana entre dos puntos.
+        Calcula la matriz de distancias euclidianas (truncadas a entero) entre todos los puntos.
 
         Args:
-            xi (float): Coordenada X del primer punto.
-            xj (float): Coordenada X del segundo punto.
-            yi (float): Coordenada Y del primer punto.
-            yj (float): Coordenada Y del segundo punto.
+            coordenadas (np.ndarray): Matriz (n + 1) x 2 con las coordenadas, el proveedor en la fila 0.
 
         Returns:
-            float: Distancia entre los dos puntos.
+            np.ndarray: Matriz (n + 1) x (n + 1) de distancias enteras.
         """
-        return int(math.dist((xi,yi),(xj,yj)))
+        diferencias = coordenadas[:, None, :] - coordenadas[None, :, :]
+        return np.hypot(diferencias[..., 0], diferencias[..., 1]).astype(np.int64)
+
+    def calcular_matriz_candidatos(self, k: int) -> np.ndarray:
+        """
+        Calcula las listas de candidatos de los vecindarios granulares. Para cada cliente se toman sus k
+        clientes más cercanos y sus k clientes más compatibles, es decir, con demanda y ritmo de visitas
+        (períodos que cubre una reposición completa, (U - L) / demanda) más parecidos. La relación se
+        hace simétrica para que un par sea candidato desde cualquiera de sus dos clientes.
+
+        Args:
+            k (int): Cantidad de candidatos por criterio. Con k <= 0 todos los pares son candidatos.
+
+        Returns:
+            np.ndarray: Matriz booleana n x n, indexada por cliente.indice, con la diagonal en False.
+        """
+        n = len(self.clientes)
+        if k <= 0 or k >= n - 1:
+            return ~np.eye(n, dtype=bool)
+
+        distancias = self.matriz_distancia[1:, 1:].astype(np.float64)
+        ritmos = (self.niveles_maximos - self.niveles_minimos) / np.maximum(self.demandas, 1)
+        diferencias = sum(
+            np.abs(v[:, None] - v[None, :]) / (v.std() or 1.0)
+            for v in (self.demandas.astype(np.float64), ritmos)
+        )
+
+        candidatos = np.zeros((n, n), dtype=bool)
+        filas = np.arange(n)[:, None]
+        for criterio in (distancias, diferencias):
+            np.fill_diagonal(criterio, np.inf)
+            candidatos[filas, np.argsort(criterio, axis=1, kind='stable')[:, :k]] = True
+        return candidatos | candidatos.T
@@ -10,6 +10,8 @@ class Entidad():
     - costo_almacenamiento: Costo de almacenamiento asociado a la entidad.
     """
 
+    __slots__ = ('id', 'coord_x', 'coord_y', 'nivel_almacenamiento', 'costo_almacenamiento')
+
     def __init__(self, id, coord_x, coord_y, nivel_almacenamiento, costo_almacenamiento) -> None:
         """
         Constructor de la clase Entidad.
@@ -46,13 +48,16 @@ class Cliente(Entidad):
     - nivel_minimo: Nivel mínimo permitido para el cliente.
     - nivel_demanda: Nivel de demanda del cliente.
     - distancia_proveedor: Distancia al proveedor desde el cliente.
+    - indice: Posición del cliente en el contexto (fila en las matrices de la solución).
 
     Métodos:
-    - __init__(id, coord_x, coord_y, nivel_almacenamiento, nivel_maximo, nivel_minimo, nivel_demanda, costo_almacenamiento, distancia_proveedor):
+    - __init__(id, coord_x, coord_y, nivel_almacenamiento, nivel_maximo, nivel_minimo, nivel_demanda, costo_almacenamiento, distancia_proveedor, indice):
         Constructor de la clase Cliente.
     """
 
-    def __init__(self, id, coord_x, coord_y, nivel_almacenamiento, nivel_maximo, nivel_minimo, nivel_demanda, costo_almacenamiento, distancia_proveedor) -> None:
+    __slots__ = ('nivel_maximo', 'nivel_minimo', 'nivel_demanda', 'distancia_proveedor', 'indice')
+
+    def __init__(self, id, coord_x, coord_y, nivel_almacenamiento, nivel_maximo, nivel_minimo, nivel_demanda, costo_almacenamiento, distancia_proveedor, indice=None) -> None:
         """
         Constructor de la clase Cliente.
 
@@ -61,12 +66,14 @@ class Cliente(Entidad):
         - nivel_minimo: Nivel mínimo del cliente.
         - nivel_demanda: Nivel de demanda del cliente.
         - distancia_proveedor: Distancia al proveedor desde el cliente.
+        - indice: Posición del cliente en el contexto. Lo asigna Contexto.
         """
         super().__init__(id, coord_x, coord_y, nivel_almacenamiento, costo_almacenamiento)
         self.nivel_maximo = nivel_maximo
         self.nivel_minimo = nivel_minimo
         self.nivel_demanda = nivel_demanda
         self.distancia_proveedor = distancia_proveedor
+        self.indice = indice
 
 
 class Proveedor(Entidad):
@@ -81,6 +88,8 @@ class Proveedor(Entidad):
         Constructor de la clase Proveedor.
     """
 
+    __slots__ = ('nivel_produccion',)
+
     def __init__(self, id, coord_x, coord_y, nivel_almacenamiento, nivel_produccion, costo_almacenamiento) -> None:
         """
         Constructor de la clase Proveedor.
@@ -1,9 +1,11 @@
+import heapq
 import math
 import random
+import sqlite3
 from random import shuffle, randint
 from typing import Set, Tuple
 from modelos.solucion import Solucion
-from collections import deque
+from collections import OrderedDict, deque
 import numpy as np
 from modelos.contexto_file import contexto_ejecucion
 
@@ -150,21 +152,295 @@ class FactorPenalizacion:
         """
         return self.value
 
+class EstadisticasVecindario:
+    """
+    Conteo de los vecinos repetidos que se descartan al construir el vecindario, antes del ajuste del
+    paso 2 (trabajo de ajuste y evaluación ahorrado) y después de él.
+
+    Atributos:
+        iteraciones (int): Vecindarios registrados.
+        repetidos_antes_ajuste (int): Total de vecinos de N'(s) repetidos descartados antes del ajuste.
+        repetidos_despues_ajuste (int): Total de vecinos ajustados repetidos descartados.
+        ultima_iteracion (tuple[int, int]): Repetidos (antes, después del ajuste) del último vecindario.
+    """
+
+    def __init__(self) -> None:
+        self.iteraciones = 0
+        self.repetidos_antes_ajuste = 0
+        self.repetidos_despues_ajuste = 0
+        self.ultima_iteracion = (0, 0)
+
+    def registrar(self, antes_ajuste: int, despues_ajuste: int) -> None:
+        """
+        Registra los repetidos descartados en la construcción de un vecindario.
+
+        Args:
+            antes_ajuste (int): Repetidos descartados antes del ajuste.
+            despues_ajuste (int): Repetidos descartados después del ajuste.
+        """
+        self.iteraciones += 1
+        self.repetidos_antes_ajuste += antes_ajuste
+        self.repetidos_despues_ajuste += despues_ajuste
+        self.ultima_iteracion = (antes_ajuste, despues_ajuste)
+
+    def __str__(self) -> str:
+        iteraciones = max(self.iteraciones, 1)
+        return (
+            f"Repetidos por iteración: {self.repetidos_antes_ajuste / iteraciones:.1f} antes del ajuste, "
+            f"{self.repetidos_despues_ajuste / iteraciones:.1f} después ({self.iteraciones} iteraciones)"
+        )
+
+class TablaTransposicion:
+    """
+    Tabla de transposición LRU, acotada en memoria, para no repetir trabajo sobre soluciones ya vistas.
+
+    Las claves son tuplas cuyo primer elemento es el tipo de entrada y que incluyen el hash de 64 bits de
+    la solución: ('evaluacion', hash) guarda la admisibilidad, la factibilidad y los componentes del costo
+    que dependen sólo de las visitas (junto con una huella de las entregas para detectar colisiones del
+    hash), ('mejora', ...) guarda la solución devuelta por `mejora()` y ('recorrido', clientes) guarda el
+    mejor recorrido conocido de un conjunto de clientes (ver `CacheRecorridos`).
+    Cuando la memoria estimada supera el máximo se desalojan las entradas usadas hace más tiempo.
+
+    Atributos:
+        memoria_maxima (int): Memoria máxima estimada en bytes (0 deshabilita la tabla).
+        memoria (int): Memoria estimada de las entradas guardadas.
+        aciertos (dict): Consultas encontradas, por tipo de entrada.
+        fallos (dict): Consultas no encontradas, por tipo de entrada.
+        desalojos (int): Entradas desalojadas por falta de memoria.
+    """
+
+    # Memoria estimada de una entrada de evaluación (clave, tupla de valores y nodo del diccionario)
+    TAMANO_EVALUACION = 400
+
+    def __init__(self, memoria_maxima: int) -> None:
+        """
+        Args:
+            memoria_maxima (int): Memoria máxima estimada en bytes (0 deshabilita la tabla).
+        """
+        self.memoria_maxima = memoria_maxima
+        self.memoria = 0
+        self._entradas = OrderedDict()
+        self.aciertos = {'evaluacion': 0, 'mejora': 0, 'recorrido': 0}
+        self.fallos = {'evaluacion': 0, 'mejora': 0, 'recorrido': 0}
+        self.desalojos = 0
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def __str__(self) -> str:
+        return (
+            f"Tabla de transposición: {len(self)} entradas, {self.memoria / 2**20:.1f} MiB, "
+            + ", ".join(f"{tipo} {self.aciertos[tipo]} aciertos / {self.fallos[tipo]} fallos" for tipo in self.aciertos)
+            + f", {self.desalojos} desalojos"
+        )
+
+    def obtener(self, clave: tuple):
+        """
+        Busca una entrada y la marca como la usada más recientemente.
+
+        Args:
+            clave (tuple): Clave de la entrada.
+
+        Returns:
+            El valor guardado, o None si no está.
+        """
+        if not self.memoria_maxima:
+            return None
+        entrada = self._entradas.get(clave)
+        if entrada is None:
+            self.fallos[clave[0]] += 1
+            return None
+        self._entradas.move_to_end(clave)
+        self.aciertos[clave[0]] += 1
+        return entrada[0]
+
+    def guardar(self, clave: tuple, valor, tamano: int = TAMANO_EVALUACION) -> None:
+        """
+        Guarda una entrada, desalojando las menos usadas si se supera la memoria máxima.
+
+        Args:
+            clave (tuple): Clave de la entrada.
+            valor: Valor a guardar.
+            tamano (int, opcional): Memoria estimada de la entrada en bytes.
+        """
+        if not self.memoria_maxima or tamano > self.memoria_maxima:
+            return
+        anterior = self._entradas.pop(clave, None)
+        if anterior is not None:
+            self.memoria -= anterior[1]
+        self._entradas[clave] = (valor, tamano)
+        self.memoria += tamano
+        while self.memoria > self.memoria_maxima:
+            _, (_, tamano_desalojado) = self._entradas.popitem(last=False)
+            self.memoria -= tamano_desalojado
+            self.desalojos += 1
+
+    @staticmethod
+    def tamano_solucion(solucion: Solucion) -> int:
+        """
+        Estima la memoria de una solución guardada: sus matrices y sus rutas.
+        """
+        matrices = (solucion.entregas, solucion.visitas, solucion.inventarios, solucion.inventario_proveedor)
+        visitas = sum(len(ruta.clientes) for ruta in solucion.rutas)
+        return sum(matriz.nbytes for matriz in matrices) + 200 * len(solucion.rutas) + 80 * visitas + 400
+
+class CacheRecorridos:
+    """
+    Caché de recorridos optimizados: para cada conjunto de clientes guarda el mejor orden de visita
+    conocido (como índices de clientes) y su costo.
+
+    Tiene dos niveles: la tabla de transposición del proceso, con claves ('recorrido', clientes), y
+    opcionalmente un archivo SQLite compartido entre procesos y ejecuciones, donde las entradas se
+    identifican además por la huella de la instancia (la de su matriz de distancias). Las consultas
+    que se encuentran en disco se copian a memoria, y en disco sólo se reemplaza un recorrido por otro
+    más barato.
+
+    Atributos:
+        archivo (str): Archivo SQLite del nivel en disco (None si no se usa).
+        huella (str): Huella de la instancia.
+        aciertos (int): Consultas encontradas en disco.
+        fallos (int): Consultas no encontradas en disco.
+        escrituras (int): Recorridos guardados en disco.
+    """
+
+    # Memoria estimada de una entrada en la tabla de transposición, fija más por cliente
+    TAMANO_RECORRIDO = 300
+    TAMANO_CLIENTE = 80
+
+    def __init__(self, tabla: TablaTransposicion, archivo: str, huella: str) -> None:
+        """
+        Args:
+            tabla (TablaTransposicion): Tabla de transposición del proceso (nivel en memoria).
+            archivo (str): Archivo SQLite del nivel en disco, o None para no usarlo.
+            huella (str): Huella de la instancia.
+        """
+        self.tabla = tabla
+        self.archivo = archivo
+        self.huella = huella
+        self._conexion = None
+        self.aciertos = 0
+        self.fallos = 0
+        self.escrituras = 0
+
+    def __str__(self) -> str:
+        if not self.archivo:
+            return "Caché de recorridos en disco: deshabilitada"
+        consultas = self.aciertos + self.fallos
+        return (
+            f"Caché de recorridos en disco ({self.archivo}): {self.aciertos} aciertos / {self.fallos} fallos "
+            f"({self.aciertos / consultas if consultas else 0:.0%}), {self.escrituras} escrituras"
+        )
+
+    def conexion(self) -> sqlite3.Connection:
+        """
+        Abre el archivo SQLite la primera vez que se usa, creando la tabla si no existe.
+        """
+        if self._conexion is None:
+            self._conexion = sqlite3.connect(self.archivo, timeout=30, isolation_level=None)
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS recorridos ("
+                "huella TEXT, clientes TEXT, orden TEXT, costo REAL, PRIMARY KEY (huella, clientes))"
+            )
+        return self._conexion
+
+    @staticmethod
+    def _texto(indices) -> str:
+        return ",".join(map(str, indices))
+
+    def obtener(self, clientes: frozenset) -> tuple:
+        """
+        Busca el mejor recorrido conocido de un conjunto de clientes, primero en memoria y luego en disco.
+
+        Args:
+            clientes (frozenset): Índices de los clientes de la ruta.
+
+        Returns:
+            tuple: (orden, costo), con el orden como tupla de índices de clientes, o None si no se conoce.
+        """
+        recorrido = self.tabla.obtener(('recorrido', clientes))
+        if recorrido is not None or not self.archivo:
+            return recorrido
+        fila = self.conexion().execute(
+            "SELECT orden, costo FROM recorridos WHERE huella = ? AND clientes = ?",
+            (self.huella, self._texto(sorted(clientes)))
+        ).fetchone()
+        if fila is None:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        recorrido = (tuple(int(indice) for indice in fila[0].split(",")), fila[1])
+        self.tabla.guardar(('recorrido', clientes), recorrido, self.TAMANO_RECORRIDO + self.TAMANO_CLIENTE * len(clientes))
+        return recorrido
+
+    def guardar(self, orden: tuple, costo: float) -> None:
+        """
+        Guarda el recorrido como el mejor conocido de su conjunto de clientes.
+
+        Args:
+            orden (tuple): Índices de los clientes en el orden de visita.
+            costo (float): Costo del recorrido.
+        """
+        clientes = frozenset(orden)
+        self.tabla.guardar(('recorrido', clientes), (orden, costo), self.TAMANO_RECORRIDO + self.TAMANO_CLIENTE * len(orden))
+        if not self.archivo:
+            return
+        self.conexion().execute(
+            "INSERT INTO recorridos VALUES (?, ?, ?, ?) ON CONFLICT (huella, clientes) "
+            "DO UPDATE SET orden = excluded.orden, costo = excluded.costo WHERE excluded.costo < recorridos.costo",
+            (self.huella, self._texto(sorted(clientes)), self._texto(orden), costo)
+        )
+        self.escrituras += 1
+
 class TabuLists:
     """
     Clase que gestiona las listas tabú para movimientos de una solución.
 
+    Las listas se guardan como matrices clientes x T con la iteración en la que expira la prohibición de
+    cada par (cliente, tiempo), indexadas por cliente.indice. Un par está prohibido mientras su expiración
+    sea posterior a la última iteración en la que se actualizaron las listas, por lo que las entradas
+    vencidas no necesitan eliminarse.
+
+    Las visitas removidas y agregadas por un movimiento se toman del propio vecino
+    (`Solucion.visitas_cambiadas`), por lo que verificar y registrar un movimiento cuesta el tamaño del movimiento.
+
     Atributos:
-        lista_r (Set[Tuple[int, int, int]]): Conjunto tabú de remociones (cliente, tiempo, ttl).
-        lista_a (Set[Tuple[int, int, int]]): Conjunto tabú de adiciones (cliente, tiempo, ttl).
+        expiracion_r (np.ndarray): Expiraciones tabú de remociones (visitas que no se pueden quitar).
+        expiracion_a (np.ndarray): Expiraciones tabú de adiciones (visitas que no se pueden agregar).
+        iteracion (int): Última iteración en la que se actualizaron las listas.
+        consultas (int): Movimientos verificados.
+        bloqueos (int): Movimientos verificados que resultaron prohibidos.
     """
 
     def __init__(self) -> None:
         """
-        Inicializa las listas tabú como conjuntos para mejorar la eficiencia de búsqueda.
+        Inicializa las listas tabú vacías para el contexto de ejecución actual.
+        """
+        contexto = contexto_ejecucion.get()
+        forma = (len(contexto.clientes), contexto.horizonte_tiempo)
+        self.expiracion_r = np.zeros(forma, dtype=np.int64)
+        self.expiracion_a = np.zeros(forma, dtype=np.int64)
+        self.iteracion = 0
+        self.consultas = 0
+        self.bloqueos = 0
+
+    @property
+    def lista_r(self) -> Set[Tuple[int, int, int]]:
+        """
+        Entradas vigentes de remoción como ternas (id de cliente, tiempo, iteración de expiración).
+        """
+        return self._entradas(self.expiracion_r)
+
+    @property
+    def lista_a(self) -> Set[Tuple[int, int, int]]:
+        """
+        Entradas vigentes de adición como ternas (id de cliente, tiempo, iteración de expiración).
         """
-        self.lista_r: Set[Tuple[int, int, int]] = set()
-        self.lista_a: Set[Tuple[int, int, int]] = set()
+        return self._entradas(self.expiracion_a)
+
+    def _entradas(self, expiracion: np.ndarray) -> Set[Tuple[int, int, int]]:
+        clientes = contexto_ejecucion.get().clientes
+        return {(clientes[i].id, int(t), int(expiracion[i, t])) for i, t in zip(*np.nonzero(expiracion > self.iteracion))}
 
     def __str__(self) -> str:
         """
@@ -173,11 +449,12 @@ class TabuLists:
         Returns:
             str: Representación de las listas tabú.
         """
-        return f"lista_a: {list(self.lista_a)}, lista_r: {list(self.lista_r)}"
+        return f"lista_a: {list(self.lista_a)}, lista_r: {list(self.lista_r)}, bloqueos: {self.bloqueos}/{self.consultas}"
 
     def actualizar(self, solucion: Solucion, solucion_prima: Solucion, main_iterator: int) -> None:
         """
-        Actualiza las listas tabú eliminando entradas expiradas y agregando nuevos movimientos prohibidos.
+        Actualiza las listas tabú agregando los movimientos prohibidos por el paso de solucion a solucion_prima.
+        Las entradas con expiración anterior o igual a la iteración actual dejan de estar vigentes.
 
         Args:
             solucion (Solucion): Solución original.
@@ -185,25 +462,23 @@ class TabuLists:
             main_iterator (int): Iterador principal.
         """
         contexto = solucion.contexto
-        
-        # Primero se eliminan los elementos que correspondan en la iteración actual
-        self.lista_r = {item for item in self.lista_r if item[2] > main_iterator}
-        self.lista_a = {item for item in self.lista_a if item[2] > main_iterator}
+        cota_variacion = math.floor(contexto.lambda_ttl * math.sqrt(len(contexto.clientes) * contexto.horizonte_tiempo))
 
-        for cliente in contexto.clientes:
-            # Identificar movimientos de remoción y adición
-            elementos_r = set(solucion_prima.tiempos_cliente(cliente)) - set(solucion.tiempos_cliente(cliente))
-            elementos_a = set(solucion.tiempos_cliente(cliente)) - set(solucion_prima.tiempos_cliente(cliente))
+        # Visitas removidas y agregadas para llegar de solucion a solucion_prima
+        removidas, agregadas = solucion_prima.visitas_cambiadas(solucion)
 
-            # Calcular el TTL basado en los parámetros
-            variacion = randint(0, math.floor(contexto.lambda_ttl * math.sqrt(len(contexto.clientes) * contexto.horizonte_tiempo)))
-            ttl = contexto.taboo_len + variacion
-    
-            # Agregar los elementos a las listas según corresponda
-            for t in elementos_r:
-                self.lista_r.add((cliente.id, t, main_iterator + ttl))
-            for t in elementos_a:
-                self.lista_a.add((cliente.id, t, main_iterator + ttl))
+        # TTL por cliente basado en los parámetros
+        ttl = {}
+        for cliente, _ in sorted(removidas + agregadas, key=lambda visita: visita[0].indice):
+            if cliente.indice not in ttl:
+                ttl[cliente.indice] = contexto.taboo_len + randint(0, cota_variacion)
+
+        # Quitar una visita agregada y volver a agregar una removida quedan prohibidos
+        for expiracion, visitas in ((self.expiracion_r, agregadas), (self.expiracion_a, removidas)):
+            for cliente, t in visitas:
+                expiracion[cliente.indice, t] = max(expiracion[cliente.indice, t], main_iterator + ttl[cliente.indice])
+
+        self.iteracion = main_iterator
 
     def movimiento_permitido(self, solucion_original: Solucion, solucion_prima: Solucion) -> bool:
         """
@@ -216,18 +491,101 @@ class TabuLists:
         Returns:
             bool: True si los movimientos están permitidos, False en caso contrario.
         """
-        contexto = solucion_original.contexto
-        for cliente in contexto.clientes:
-            tiempos_r = set(solucion_original.tiempos_cliente(cliente)) - set(solucion_prima.tiempos_cliente(cliente))
-            tiempos_a = set(solucion_prima.tiempos_cliente(cliente)) - set(solucion_original.tiempos_cliente(cliente))
+        return self.cambios_permitidos(*solucion_prima.visitas_cambiadas(solucion_original))
+
+    def cambios_permitidos(self, removidas, agregadas) -> bool:
+        """
+        Verifica si se permite quitar y agregar las visitas dadas.
+
+        Args:
+            removidas (Iterable[Tuple[Cliente, int]]): Visitas (cliente, tiempo) que se quitan.
+            agregadas (Iterable[Tuple[Cliente, int]]): Visitas (cliente, tiempo) que se agregan.
+
+        Returns:
+            bool: True si los movimientos están permitidos, False en caso contrario.
+        """
+        iteracion = self.iteracion
+        permitido = not (
+            any(self.expiracion_r[cliente.indice, t] > iteracion for cliente, t in removidas) or
+            any(self.expiracion_a[cliente.indice, t] > iteracion for cliente, t in agregadas)
+        )
+        return self._contar(permitido)
+
+    def _contar(self, permitido: bool) -> bool:
+        self.consultas += 1
+        if not permitido:
+            self.bloqueos += 1
+        return permitido
+
+class SelectorVecindario:
+    """
+    Selección de una sola pasada sobre el vecindario de una solución. Conserva sólo el mejor vecino permitido,
+    el mejor no permitido por las listas tabú y, si `top_k` es positivo, los `top_k` mejores permitidos para
+    diversificar, por lo que la memoria no depende del tamaño del vecindario.
+
+    Atributos:
+        mejor_permitido (Solucion): Mejor vecino permitido visto (None si no hay).
+        mejor_no_permitido (Solucion): Mejor vecino no permitido visto (None si no hay).
+        evaluados (int): Vecinos vistos.
+    """
 
-            # Verificar si algún movimiento está prohibido en lista_r
-            if any((cliente.id, t, ttl) in self.lista_r for t in tiempos_r for _, _, ttl in self.lista_r):
-                return False
-            # Verificar si algún movimiento está prohibido en lista_a
-            if any((cliente.id, t, ttl) in self.lista_a for t in tiempos_a for _, _, ttl in self.lista_a):
-                return False
-        return True
+    def __init__(self, solucion: Solucion, tabulists: TabuLists, top_k: int = 0) -> None:
+        """
+        Args:
+            solucion (Solucion): Solución actual.
+            tabulists (TabuLists): Listas tabú con las que se verifica cada vecino.
+            top_k (int, opcional): Cantidad de mejores vecinos permitidos a conservar. Por defecto, 0.
+        """
+        self.solucion = solucion
+        self.tabulists = tabulists
+        self.top_k = top_k
+        self.mejor_permitido = None
+        self.mejor_no_permitido = None
+        self.evaluados = 0
+        # Montículo de (-costo, -orden, vecino): la raíz es el peor de los k mejores
+        self._mejores = []
+
+    def agregar(self, vecino: Solucion) -> bool:
+        """
+        Considera un vecino para la selección.
+
+        Args:
+            vecino (Solucion): Vecino de la solución actual.
+
+        Returns:
+            bool: True si el movimiento al vecino está permitido por las listas tabú.
+        """
+        permitido = self.tabulists.movimiento_permitido(self.solucion, vecino)
+        costo = vecino.costo()
+        if permitido:
+            if self.mejor_permitido is None or costo < self.mejor_permitido.costo():
+                self.mejor_permitido = vecino
+            if self.top_k > 0:
+                entrada = (-costo, -self.evaluados, vecino)
+                if len(self._mejores) < self.top_k:
+                    heapq.heappush(self._mejores, entrada)
+                elif entrada[:2] > self._mejores[0][:2]:
+                    heapq.heapreplace(self._mejores, entrada)
+        elif self.mejor_no_permitido is None or costo < self.mejor_no_permitido.costo():
+            self.mejor_no_permitido = vecino
+        self.evaluados += 1
+        return permitido
+
+    def mejores_permitidos(self) -> list[Solucion]:
+        """
+        Devuelve los `top_k` mejores vecinos permitidos, de menor a mayor costo.
+        """
+        return [vecino for _, _, vecino in sorted(self._mejores, key=lambda entrada: entrada[:2], reverse=True)]
+
+    def elegir(self) -> tuple[Solucion, Solucion, bool]:
+        """
+        Devuelve el vecino permitido elegido (el mejor o, con `top_k` positivo, uno al azar entre los
+        `top_k` mejores), el mejor no permitido y si se vio algún vecino.
+        """
+        permitido = self.mejor_permitido
+        if self._mejores:
+            permitido = random.choice(self.mejores_permitidos())
+        return permitido, self.mejor_no_permitido, self.evaluados > 0
 
 class SolutionHistory:
     def __init__(self, max_history=500):
@@ -239,7 +597,8 @@ class SolutionHistory:
         self.last_solution_hash = None
     
     def add_solution(self, solution):
-        solution_hash = hash(tuple(frozenset(tuple(sorted(cliente.id for cliente in ruta.clientes))) for ruta in solution.rutas))
+        # Hash incremental de la solución (visitas y cantidades por tiempo)
+        solution_hash = hash(solution)
         self.history.append(solution_hash)
 
         if self.last_solution_hash == solution_hash:
@@ -0,0 +1,86 @@
+from modelos.entidad import Cliente
+
+class Movimiento:
+    """
+    Descriptor de un movimiento del vecindario de una solución.
+
+    Describe el movimiento por su tipo ('eliminacion', 'insercion', 'mover' o 'intercambio'), el cliente,
+    los tiempos de origen y destino y la cantidad movida, junto con la lista completa de cambios de entrega
+    que produce al aplicar las políticas OU/ML. Cada cambio es una terna (cliente, tiempo, cantidad), con
+    cantidad None si la visita se elimina.
+
+    `delta` es la variación del costo respecto de la solución de la que se generó, evaluada sin construir
+    la Solucion. `aplicar()` construye la Solucion resultante.
+    """
+
+    __slots__ = ('tipo', 'cliente', 't_origen', 't_destino', 'cantidad', 'cliente_intercambio', 'cambios', 'delta')
+
+    def __init__(
+        self,
+        tipo: str,
+        cliente: Cliente,
+        t_origen: int,
+        t_destino: int,
+        cantidad: int,
+        cambios: tuple,
+        delta: float,
+        cliente_intercambio: Cliente = None
+    ) -> None:
+        """
+        Args:
+            tipo (str): Tipo de movimiento.
+            cliente (Cliente): Cliente movido.
+            t_origen (int): Tiempo del que se quita la visita (None en una inserción).
+            t_destino (int): Tiempo en el que se agrega la visita (None en una eliminación).
+            cantidad (int): Cantidad entregada en t_destino, o quitada de t_origen en una eliminación.
+            cambios (tuple): Cambios de entrega (cliente, tiempo, cantidad) sobre la solución de origen.
+            delta (float): Variación del costo.
+            cliente_intercambio (Cliente, opcional): Cliente que hace el recorrido inverso en un intercambio.
+        """
+        self.tipo = tipo
+        self.cliente = cliente
+        self.t_origen = t_origen
+        self.t_destino = t_destino
+        self.cantidad = cantidad
+        self.cliente_intercambio = cliente_intercambio
+        self.cambios = cambios
+        self.delta = delta
+
+    def __str__(self) -> str:
+        clientes = f"{self.cliente.id}<->{self.cliente_intercambio.id}" if self.cliente_intercambio else f"{self.cliente.id}"
+        return f"{self.tipo}({clientes}, {self.t_origen} -> {self.t_destino}, {self.cantidad}) Δ={self.delta:.2f}"
+
+    def visitas_agregadas(self, solucion) -> list[tuple]:
+        """
+        Visitas (cliente, tiempo) que el movimiento agrega a la solución de origen.
+        """
+        return [(cliente, t) for cliente, t, cantidad in self.cambios
+                if cantidad is not None and not solucion.visitas[cliente.indice, t]]
+
+    def visitas_removidas(self) -> list[tuple]:
+        """
+        Visitas (cliente, tiempo) que el movimiento quita de la solución de origen.
+        """
+        return [(cliente, t) for cliente, t, cantidad in self.cambios if cantidad is None]
+
+    def aplicar(self, solucion):
+        """
+        Construye la solución resultante de aplicar el movimiento. Las visitas nuevas se insertan en la
+        posición de menor costo de la ruta, igual que en la evaluación del movimiento.
+
+        Args:
+            solucion (Solucion): Solución de la que se generó el movimiento.
+
+        Returns:
+            Solucion: Nueva instancia de Solución.
+        """
+        borrador = solucion.editar()
+        # Primero las eliminaciones, para que las inserciones se evalúen sobre las rutas ya reducidas
+        for cliente, t, cantidad in sorted(self.cambios, key=lambda cambio: cambio[2] is not None):
+            if cantidad is None:
+                borrador.eliminar_visita_atomica(cliente, t)
+            elif borrador.rutas[t].es_visitado(cliente):
+                borrador.establecer_cantidad_cliente(cliente, t, cantidad)
+            else:
+                borrador.insertar_visita_atomica(cliente, t, cantidad=cantidad)
+        return borrador.confirmar()
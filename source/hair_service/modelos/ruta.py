@@ -1,56 +1,52 @@
-import math
+import numpy as np
 from modelos.entidad import Cliente
-
-# Distancia entre dos puntos
-def compute_dist(xi, xj, yi, yj) -> float:
-    """
-    Calcula la distancia euclidiana entre dos puntos dados.
-
-    Args:
-        xi (float): Coordenada X del primer punto.
-        xj (float): Coordenada X del segundo punto.
-        yi (float): Coordenada Y del primer punto.
-        yj (float): Coordenada Y del segundo punto.
-
-    Returns:
-        float: Distancia euclidiana entre los dos puntos.
-    """
-    return int(math.dist((xi, yi), (xj, yj)))
+from modelos.contexto_file import contexto_ejecucion
 
 class Ruta:
     """
     Clase que representa una ruta de entrega inmutable.
 
-    Contiene la tupla de clientes y las cantidades entregadas a cada uno.
+    Contiene la tupla de clientes y las cantidades entregadas a cada uno, junto con un
+    índice cliente -> posición para consultas de pertenencia y cantidad en O(1).
     """
 
+    __slots__ = ('clientes', 'cantidades', 'posiciones', 'costo')
+
+    @staticmethod
+    def obtener_nodos(clientes: tuple[Cliente, ...]) -> list[int]:
+        """
+        Obtiene los índices en la matriz de distancias del recorrido, comenzando y terminando en el proveedor (0).
+
+        Args:
+            clientes (tuple[Cliente]): Tupla de clientes en el orden de visita.
+
+        Returns:
+            list[int]: Índices de los nodos del recorrido.
+        """
+        return [0] + [cliente.indice + 1 for cliente in clientes] + [0]
+
     @staticmethod
     def obtener_costo_recorrido(clientes: tuple[Cliente, ...]) -> float:
         if not clientes:
             return 0.0
 
-        costo_total = 0.0
-        costo_total += clientes[0].distancia_proveedor  # Distancia del proveedor al primer cliente
+        matriz_distancia = contexto_ejecucion.get().matriz_distancia
+        nodos = Ruta.obtener_nodos(clientes)
+        return float(matriz_distancia[nodos[:-1], nodos[1:]].sum())
 
-        costo_total += sum(
-            compute_dist(c1.coord_x, c2.coord_x, c1.coord_y, c2.coord_y)
-            for c1, c2 in zip(clientes, clientes[1:])
-        )
-
-        costo_total += clientes[-1].distancia_proveedor  # Distancia del último cliente de vuelta
-        return costo_total
-
-    def __init__(self, clientes: tuple[Cliente, ...] = (), cantidades: tuple[int, ...] = ()) -> None:
+    def __init__(self, clientes: tuple[Cliente, ...] = (), cantidades: tuple[int, ...] = (), costo: float = None) -> None:
         """
         Inicializa una ruta con clientes y cantidades entregadas como tuplas inmutables.
 
         Args:
             clientes (tuple[Cliente], opcional): Tupla de clientes en la ruta.
             cantidades (tuple[int], opcional): Tupla de cantidades entregadas a cada cliente.
+            costo (float, opcional): Costo del recorrido si ya se conoce (p. ej. calculado por diferencias).
         """
         self.clientes = clientes
         self.cantidades = cantidades
-        self.costo = self.obtener_costo_recorrido(clientes)
+        self.posiciones = {cliente: posicion for posicion, cliente in enumerate(clientes)}
+        self.costo = self.obtener_costo_recorrido(clientes) if costo is None else costo
 
     def __str__(self) -> str:
         """
@@ -102,38 +98,120 @@ class Ruta:
         Returns:
             int: Cantidad entregada al cliente.
         """
-        if cliente not in self.clientes:
+        posicion = self.posiciones.get(cliente)
+        if posicion is None:
             return 0  # No se encontró el cliente, retornamos 0 por defecto
 
-        return next((self.cantidades[i] for i, c in enumerate(self.clientes) if c == cliente), 0)
+        return self.cantidades[posicion]
+
+    def costos_insercion(self, cliente: Cliente) -> np.ndarray:
+        """
+        Calcula el incremento del costo del recorrido al insertar un cliente en cada posición posible,
+        d(anterior, c) + d(c, siguiente) - d(anterior, siguiente).
+
+        Args:
+            cliente (Cliente): Cliente a insertar.
+
+        Returns:
+            np.ndarray: Incremento de costo para cada índice de inserción (len(clientes) + 1 valores).
+        """
+        matriz_distancia = contexto_ejecucion.get().matriz_distancia
+        nodos = self.obtener_nodos(self.clientes)
+        anteriores, siguientes, nuevo = nodos[:-1], nodos[1:], cliente.indice + 1
+        return matriz_distancia[anteriores, nuevo] + matriz_distancia[nuevo, siguientes] - matriz_distancia[anteriores, siguientes]
+
+    def costos_insercion_minimos(self) -> np.ndarray:
+        """
+        Calcula, para todos los clientes a la vez, el menor incremento del costo del recorrido al insertarlos.
+
+        Returns:
+            np.ndarray: Incremento mínimo de costo de cada cliente, indexado por cliente.indice.
+        """
+        matriz_distancia = contexto_ejecucion.get().matriz_distancia
+        nodos = self.obtener_nodos(self.clientes)
+        anteriores, siguientes = nodos[:-1], nodos[1:]
+        clientes = np.arange(1, len(matriz_distancia))
+        incrementos = (
+            matriz_distancia[np.ix_(anteriores, clientes)] + matriz_distancia[np.ix_(clientes, siguientes)].T -
+            matriz_distancia[anteriores, siguientes][:, None]
+        )
+        return incrementos.min(axis=0)
+
+    def ahorros_eliminacion(self) -> np.ndarray:
+        """
+        Calcula el ahorro de eliminar cada cliente de la ruta (ver `ahorro_eliminacion`).
+
+        Returns:
+            np.ndarray: Ahorro de cada cliente, en el orden de visita.
+        """
+        matriz_distancia = contexto_ejecucion.get().matriz_distancia
+        nodos = self.obtener_nodos(self.clientes)
+        anteriores, actuales, siguientes = nodos[:-2], nodos[1:-1], nodos[2:]
+        return (
+            matriz_distancia[anteriores, actuales] + matriz_distancia[actuales, siguientes] -
+            matriz_distancia[anteriores, siguientes]
+        )
+
+    def ahorro_eliminacion(self, cliente: Cliente) -> float:
+        """
+        Calcula la disminución del costo del recorrido al eliminar un cliente, enlazando su predecesor con su sucesor.
+
+        Args:
+            cliente (Cliente): Cliente a eliminar.
+
+        Returns:
+            float: Ahorro de la eliminación, 0 si el cliente no está en la ruta.
+        """
+        posicion = self.posiciones.get(cliente)
+        if posicion is None:
+            return 0
+        matriz_distancia = contexto_ejecucion.get().matriz_distancia
+        anterior = self.clientes[posicion - 1].indice + 1 if posicion > 0 else 0
+        siguiente = self.clientes[posicion + 1].indice + 1 if posicion < len(self.clientes) - 1 else 0
+        actual = cliente.indice + 1
+        return float(
+            matriz_distancia[anterior, actual] + matriz_distancia[actual, siguiente] - matriz_distancia[anterior, siguiente]
+        )
 
     def insertar_visita(self, cliente: Cliente, cantidad: int, indice = None) -> "Ruta":
-        clientes_lista = list(self.clientes)
-        cantidades_lista = list(self.cantidades)
+        """
+        Inserta un cliente en la ruta, por defecto en la posición de inserción más barata.
+        El costo del recorrido se actualiza por diferencias.
+
+        Args:
+            cliente (Cliente): Cliente a insertar.
+            cantidad (int): Cantidad a entregar.
+            indice (int, opcional): Posición de inserción (con la semántica de list.insert).
+
+        Returns:
+            Ruta: Nueva instancia con la visita insertada.
+        """
+        incrementos = self.costos_insercion(cliente)
 
         # Determinar la mejor posición si no se proporciona un índice
         if indice is None:
-            costos = [
-                self.obtener_costo_recorrido(tuple(clientes_lista[:pos] + [cliente] + clientes_lista[pos:]))
-                for pos in range(len(clientes_lista) + 1)
-            ]
-            indice = costos.index(min(costos))
+            indice = int(incrementos.argmin())
+        elif indice < 0:
+            indice = max(0, len(self.clientes) + indice)
+        else:
+            indice = min(indice, len(self.clientes))
 
         # Insertar cliente y cantidad en la mejor posición
-        clientes_lista.insert(indice, cliente)
-        cantidades_lista.insert(indice, cantidad)
+        clientes = self.clientes[:indice] + (cliente,) + self.clientes[indice:]
+        cantidades = self.cantidades[:indice] + (cantidad,) + self.cantidades[indice:]
 
-        return Ruta(tuple(clientes_lista), tuple(cantidades_lista))
+        return Ruta(clientes, cantidades, self.costo + float(incrementos[indice]))
 
     def eliminar_visita(self, cliente: Cliente) -> "Ruta":
-        clientes_lista      = list(self.clientes)
-        cantidades_lista    = list(self.cantidades)
-        if cliente not in clientes_lista:
+        indice = self.posiciones.get(cliente)
+        if indice is None:
             return self  # Si el cliente no está, no hacer nada
-        indice = clientes_lista.index(cliente)
-        clientes_lista.pop(indice)
-        cantidades_lista.pop(indice)
-        return Ruta(tuple(clientes_lista), tuple(cantidades_lista))
+        costo = self.costo - self.ahorro_eliminacion(cliente)
+        return Ruta(
+            self.clientes[:indice] + self.clientes[indice + 1:],
+            self.cantidades[:indice] + self.cantidades[indice + 1:],
+            costo if len(self.clientes) > 1 else 0.0
+        )
 
     def modificar_cantidad_cliente(self, cliente: Cliente, cantidad: int) -> "Ruta":
         """
@@ -149,11 +227,10 @@ class Ruta:
         clientes_lista = list(self.clientes)
         cantidades_lista = list(self.cantidades)
 
-        if cliente in clientes_lista:
-            indice = clientes_lista.index(cliente)
-            cantidades_lista[indice] = cantidad
+        if cliente in self.posiciones:
+            cantidades_lista[self.posiciones[cliente]] = cantidad
 
-        return Ruta(tuple(clientes_lista), tuple(cantidades_lista))
+        return Ruta(tuple(clientes_lista), tuple(cantidades_lista), self.costo)
 
     def es_igual(self, ruta2: "Ruta") -> bool:
         """
@@ -177,19 +254,19 @@ class Ruta:
         Returns:
             bool: True si el cliente está en la ruta, False en caso contrario.
         """
-        return cliente in self.clientes
+        return cliente in self.posiciones
     
     def quitar_cantidad_cliente(self, cliente: Cliente, cantidad: int) -> "Ruta":
-        if cliente not in self.clientes:
+        if cliente not in self.posiciones:
             return self  # Retorna la misma ruta si el cliente no existe
 
         nuevas_cantidades = list(self.cantidades)
-        indice_cliente = self.clientes.index(cliente)
+        indice_cliente = self.posiciones[cliente]
 
         nueva_cantidad = max(0, nuevas_cantidades[indice_cliente] - cantidad)
 
         nuevas_cantidades[indice_cliente] = nueva_cantidad
-        return Ruta(clientes=self.clientes, cantidades=tuple(nuevas_cantidades))
+        return Ruta(clientes=self.clientes, cantidades=tuple(nuevas_cantidades), costo=self.costo)
 
 
     def agregar_cantidad_cliente(self, cliente: Cliente, cantidad: int) -> "Ruta":
@@ -203,18 +280,18 @@ class Ruta:
         Returns:
             Ruta: Nueva instancia de Ruta con la cantidad actualizada.
         """
-        if cliente not in self.clientes:
+        if cliente not in self.posiciones:
             return self  # Retorna la misma ruta si el cliente no existe
 
         # Convertir la tupla a una lista para modificarla
         nuevas_cantidades = list(self.cantidades)
-        indice_cliente = self.clientes.index(cliente)
+        indice_cliente = self.posiciones[cliente]
 
         # Sumar la cantidad
         nuevas_cantidades[indice_cliente] = nuevas_cantidades[indice_cliente] + cantidad
 
         # Convertir la lista de nuevo a tupla (para mantener inmutabilidad)
-        return Ruta(clientes=self.clientes, cantidades=tuple(nuevas_cantidades))
+        return Ruta(clientes=self.clientes, cantidades=tuple(nuevas_cantidades), costo=self.costo)
     
     def establecer_cantidad_cliente(self, cliente: Cliente, cantidad: int) -> "Ruta":
         """
@@ -227,15 +304,15 @@ class Ruta:
         Returns:
             Ruta: Nueva instancia de Ruta con la cantidad actualizada.
         """
-        if cliente not in self.clientes:
+        if cliente not in self.posiciones:
             return self  # Retorna la misma ruta si el cliente no existe
 
         # Convertir la tupla a una lista para modificarla
         nuevas_cantidades = list(self.cantidades)
-        indice_cliente = self.clientes.index(cliente)
+        indice_cliente = self.posiciones[cliente]
 
         # Establecer la cantidad
         nuevas_cantidades[indice_cliente] = cantidad
 
         # Convertir la lista de nuevo a tupla (para mantener inmutabilidad)
-        return Ruta(clientes=self.clientes, cantidades=tuple(nuevas_cantidades))
+        return Ruta(clientes=self.clientes, cantidades=tuple(nuevas_cantidades), costo=self.costo)
@@ -1,33 +1,407 @@
 import matplotlib.pyplot as plt
+import numpy as np
 from modelos.ruta import Ruta
 from modelos.entidad import Cliente
 from modelos.contexto_file import contexto_ejecucion
 import random
 
+_MASCARA_64 = (1 << 64) - 1
+
+def _hash_visita(clave: int, cantidad: int) -> int:
+    """
+    Hash de 64 bits de la visita a un cliente en un tiempo con una cantidad dada (mezcla splitmix64).
+
+    Args:
+        clave (int): Clave aleatoria del par (cliente, tiempo), de `contexto.claves_hash`.
+        cantidad (int): Cantidad entregada en la visita.
+
+    Returns:
+        int: Hash de la visita.
+    """
+    x = (clave + int(cantidad)) & _MASCARA_64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASCARA_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASCARA_64
+    return x ^ (x >> 31)
+
+def _niveles_inventario_cliente(cliente: Cliente, entregas_cliente: np.ndarray) -> np.ndarray:
+    """
+    Calcula los niveles de inventario de un cliente (periodos + 1) a partir de sus entregas en cada periodo.
+
+    Args:
+        cliente (Cliente): Cliente.
+        entregas_cliente (np.ndarray): Cantidades entregadas al cliente en cada periodo.
+
+    Returns:
+        np.ndarray: Niveles de inventario del cliente.
+    """
+    inventario = np.empty(len(entregas_cliente) + 1, dtype=np.int32)
+    inventario[0] = cliente.nivel_almacenamiento
+    np.cumsum(entregas_cliente - cliente.nivel_demanda, out=inventario[1:])
+    inventario[1:] += cliente.nivel_almacenamiento
+    return inventario
+
+def _violaciones_cliente(cliente: Cliente, inventario: np.ndarray) -> int:
+    """
+    Cuenta los periodos en los que el inventario de un cliente está fuera de [nivel_minimo, nivel_maximo].
+
+    Args:
+        cliente (Cliente): Cliente.
+        inventario (np.ndarray): Niveles de inventario del cliente.
+
+    Returns:
+        int: Cantidad de periodos con desabastecimiento o sobreabastecimiento.
+    """
+    return int(np.count_nonzero((inventario < cliente.nivel_minimo) | (inventario > cliente.nivel_maximo)))
+
 class Solucion:
     """
     Clase que representa una solución para el problema de ruteo de inventarios.
 
     Contiene las rutas, niveles de inventario de clientes y proveedor, y calcula
     la factibilidad, admisibilidad y costo total de la solución.
+
+    Las entregas se guardan en una matriz clientes x periodos (`entregas`), y los niveles de
+    inventario se derivan de ella con sumas acumuladas (`inventarios`, `inventario_proveedor`).
+    Las filas se indexan con `cliente.indice`. La matriz booleana `visitas` indica si cada
+    cliente es visitado en cada periodo.
+
+    El costo se calcula una única vez por solución, separado en componentes (almacenamiento,
+    transporte, exceso de capacidad y desabastecimiento del proveedor sin ponderar). `costo()`
+    sólo los combina con los valores vigentes de `contexto.alfa` y `contexto.beta`.
+
+    Se materializan miles de soluciones por movimiento, por lo que la clase usa `__slots__`
+    y matrices de enteros de 32 bits.
+
+    El estado derivado de las rutas se calcula de forma perezosa y se memoriza: las matrices
+    (`entregas`, `visitas`, `inventarios`, `inventario_proveedor`) al primer acceso a cualquiera
+    de ellas, y la evaluación (admisibilidad, factibilidad y componentes del costo) al primer
+    acceso a alguno de sus atributos. Una vez calculadas, las matrices no se modifican, por lo que
+    `clonar()` y las soluciones derivadas las comparten.
+
+    Cada solución lleva un hash de 64 bits (XOR de `_hash_visita` sobre todas sus visitas
+    (cliente, tiempo, cantidad)) que se actualiza en O(1) al derivar una solución por la edición
+    de una visita. La igualdad y el hash de la solución se definen sobre él, por lo que no
+    dependen del orden de los clientes dentro de cada ruta.
+
+    Para aplicar varias ediciones seguidas sin construir una solución por cada una, `editar()`
+    devuelve un `BorradorSolucion` que se confirma una única vez.
+
+    La admisibilidad se lleva por cliente: `violaciones_clientes` cuenta, para cada cliente, los
+    periodos con inventario fuera de [nivel_minimo, nivel_maximo]. Una solución derivada de otra
+    (por `_derivar` o por un borrador) registra en `clientes_modificados` los clientes tocados por
+    la edición, y sólo revalida a esos clientes; el resto de los conteos se hereda del padre.
+
+    Además, cada solución derivada recuerda el hash de su solución de origen y los clientes tocados desde
+    ella, a través de ediciones, borradores y ajustes sucesivos (`como_origen()` marca una solución como
+    origen). Así `visitas_cambiadas(origen)` obtiene el movimiento que lleva del origen a la solución, con
+    un costo proporcional al tamaño del movimiento.
     """
 
+    __slots__ = (
+        'contexto', 'rutas', '_hash', '_padre', '_cambio', '_clientes_modificados', '_hash_origen', '_clientes_origen',
+        '_entregas', '_visitas', '_inventarios', '_inventario_proveedor', '_violaciones',
+        '_es_admisible', '_es_factible', '_costo_almacenamiento', '_costo_transporte',
+        '_exceso_vehiculo', '_desabastecimiento_proveedor',
+    )
+
     def __init__(self, rutas=None) -> None:
         """
-        Inicializa una solución con rutas y calcula sus propiedades iniciales.
+        Inicializa una solución con rutas. Sus propiedades se calculan al primer acceso.
 
         Args:
             rutas (tuple[Ruta], opcional): Conjunto de rutas que conforman la solución.
         """
-        self.contexto = contexto_ejecucion.get()
-        self.rutas = tuple(rutas or [Ruta((), ()) for _ in range(self.contexto.horizonte_tiempo)])
-        self.inventario_clientes = {
-            cliente.id: self._obtener_niveles_inventario_cliente(cliente)
-            for cliente in self.contexto.clientes
-        }
-        self.inventario_proveedor = self._obtener_niveles_inventario_proveedor()
-        self.es_admisible = self.es_admisible()
-        self.es_factible = self.es_factible()
+        contexto = contexto_ejecucion.get()
+        rutas = tuple(rutas or [Ruta((), ()) for _ in range(contexto.horizonte_tiempo)])
+        self._inicializar(contexto, rutas, self._calcular_hash(contexto, rutas))
+
+    def _inicializar(
+        self, contexto, rutas: tuple, valor_hash: int, padre: 'Solucion' = None, cambio: tuple = None,
+        clientes_modificados: tuple = None, origen: 'Solucion' = None
+    ) -> None:
+        """
+        Asigna las rutas y el hash, y deja todo el estado derivado pendiente de cálculo.
+
+        Args:
+            contexto (Contexto): Contexto de ejecución.
+            rutas (tuple[Ruta]): Rutas de la solución.
+            valor_hash (int): Hash de 64 bits de las visitas de la solución.
+            padre (Solucion, opcional): Solución materializada de la que se deriva esta.
+            cambio (tuple, opcional): Par (cliente, tiempo) modificado respecto del padre.
+            clientes_modificados (tuple[int], opcional): Índices de los clientes tocados por la última edición.
+            origen (Solucion, opcional): Solución de la que se deriva esta, para heredar su origen de movimientos.
+        """
+        self.contexto = contexto
+        self.rutas = rutas
+        self._hash = valor_hash
+        self._padre = padre
+        self._cambio = cambio
+        self._clientes_modificados = clientes_modificados
+        if origen is None:
+            self._hash_origen = self._clientes_origen = None
+        elif origen._hash_origen is None:
+            self._hash_origen = origen._hash
+            self._clientes_origen = frozenset(clientes_modificados)
+        else:
+            self._hash_origen = origen._hash_origen
+            self._clientes_origen = origen._clientes_origen.union(clientes_modificados)
+        self._entregas = self._visitas = self._inventarios = self._inventario_proveedor = None
+        self._violaciones = None
+        self._es_admisible = self._es_factible = None
+        self._costo_almacenamiento = self._costo_transporte = None
+        self._exceso_vehiculo = self._desabastecimiento_proveedor = None
+
+    def _materializar(self) -> None:
+        """
+        Calcula las matrices de entregas, visitas e inventarios. Si la solución fue derivada de otra
+        con las matrices ya calculadas, sólo se recalcula la fila del cliente modificado y el
+        inventario del proveedor; en otro caso se construyen a partir de las rutas.
+        """
+        padre = self._padre
+        if padre is None:
+            self._clientes_modificados = None
+            entregas = self._obtener_matriz_entregas()
+            visitas = self._obtener_matriz_visitas()
+            self._entregas = entregas
+            inventarios = self._obtener_matriz_inventarios()
+        else:
+            cliente, tiempo = self._cambio
+            ruta = self.rutas[tiempo]
+            entregas = padre._entregas.copy()
+            entregas[cliente.indice, tiempo] = ruta.obtener_cantidad_entregada(cliente)
+            visitas = padre._visitas.copy()
+            visitas[cliente.indice, tiempo] = ruta.es_visitado(cliente)
+            self._entregas = entregas
+            inventarios = padre._inventarios.copy()
+            inventarios[cliente.indice] = self._obtener_niveles_inventario_cliente(cliente)
+        self._fijar_matrices(entregas, visitas, inventarios, padre)
+
+    def _fijar_matrices(
+        self, entregas: np.ndarray, visitas: np.ndarray, inventarios: np.ndarray, padre: 'Solucion' = None
+    ) -> None:
+        """
+        Asigna las matrices de entregas, visitas e inventarios, calcula el inventario del proveedor y
+        las violaciones de nivel por cliente, y las marca como de sólo lectura. Si se indica el padre,
+        sólo se recalculan las violaciones de los clientes modificados y el resto se hereda de él.
+        """
+        contexto = self.contexto
+        self._entregas = entregas
+        self._inventarios = inventarios
+        self._visitas = visitas
+        self._inventario_proveedor = self._obtener_niveles_inventario_proveedor()
+        if padre is None or self._clientes_modificados is None:
+            violaciones = (
+                (inventarios < contexto.niveles_minimos[:, None]) | (inventarios > contexto.niveles_maximos[:, None])
+            ).sum(axis=1, dtype=np.int32)
+        else:
+            violaciones = padre._violaciones.copy()
+            for indice in self._clientes_modificados:
+                violaciones[indice] = _violaciones_cliente(contexto.clientes[indice], inventarios[indice])
+        self._violaciones = violaciones
+        for matriz in (entregas, visitas, inventarios, self._inventario_proveedor, violaciones):
+            matriz.flags.writeable = False
+        self._padre = None
+        self._cambio = None
+
+    def _evaluar(self) -> None:
+        """
+        Calcula la admisibilidad, la factibilidad y los componentes del costo a partir de las rutas y los inventarios.
+
+        Todo salvo el costo de transporte depende sólo de las visitas y cantidades, por lo que se guarda en la
+        tabla de transposición del contexto con el hash de la solución como clave; una solución ya evaluada
+        no necesita calcular sus matrices. Cada entrada guarda además la huella de las entregas
+        (`_huella_entregas()`), independiente del hash, y sólo se usa si coincide, de modo que una colisión
+        del hash no devuelve la evaluación de otra solución. El costo de transporte depende además del orden
+        de las rutas y se suma siempre a partir de ellas.
+        """
+        contexto = self.contexto
+        self._costo_transporte = sum(ruta.costo for ruta in self.rutas)
+        clave = ('evaluacion', self._hash)
+        huella = self._huella_entregas()
+        evaluacion = contexto.tabla_transposicion.obtener(clave)
+        if evaluacion is not None and evaluacion[0] == huella:
+            (self._es_admisible, self._es_factible, self._costo_almacenamiento,
+             self._exceso_vehiculo, self._desabastecimiento_proveedor) = evaluacion[1:]
+            return
+
+        self._es_admisible = self._calcular_admisibilidad()
+        self._es_factible = self._calcular_factibilidad()
+        self._costo_almacenamiento = (
+            contexto.proveedor.costo_almacenamiento * int(self.inventario_proveedor.sum()) +
+            float(contexto.costos_almacenamiento @ self.inventarios.sum(axis=1))
+        )
+        self._exceso_vehiculo = sum(
+            max(0, ruta.obtener_total_entregado() - contexto.capacidad_vehiculo) for ruta in self.rutas
+        )
+        self._desabastecimiento_proveedor = int(np.maximum(0, -self.inventario_proveedor).sum())
+        contexto.tabla_transposicion.guardar(clave, (
+            huella, self._es_admisible, self._es_factible, self._costo_almacenamiento,
+            self._exceso_vehiculo, self._desabastecimiento_proveedor
+        ))
+
+    def _huella_entregas(self) -> int:
+        """
+        Huella de la matriz de entregas calculada a partir de las rutas, sin materializarla: hash de los
+        pares (cliente, cantidad) de cada tiempo, sin importar el orden de los clientes en la ruta.
+        """
+        return hash(tuple(
+            frozenset(zip((cliente.indice for cliente in ruta.clientes), ruta.cantidades)) for ruta in self.rutas
+        ))
+
+    def _derivar(self, rutas: tuple, cliente: Cliente, tiempo: int) -> 'Solucion':
+        """
+        Crea una nueva solución a partir de esta, en la que sólo cambió la visita de un cliente en un tiempo.
+        Al materializarse, se recalcula únicamente la fila del cliente afectado y el inventario del proveedor.
+
+        Args:
+            rutas (tuple[Ruta]): Rutas de la nueva solución.
+            cliente (Cliente): Cliente cuya entrega fue modificada.
+            tiempo (int): Tiempo de la ruta modificada.
+
+        Returns:
+            Solucion: Nueva instancia de Solución.
+        """
+        # Se quita del hash la visita anterior del cliente en ese tiempo y se agrega la nueva
+        valor_hash = self._hash
+        clave = self.contexto.claves_hash[cliente.indice][tiempo]
+        for ruta in (self.rutas[tiempo], rutas[tiempo]):
+            if ruta.es_visitado(cliente):
+                valor_hash ^= _hash_visita(clave, ruta.obtener_cantidad_entregada(cliente))
+
+        nueva_solucion = Solucion.__new__(Solucion)
+        # Sólo se deriva de padres ya materializados, para no encadenar soluciones pendientes
+        padre = self if self._entregas is not None else None
+        nueva_solucion._inicializar(
+            self.contexto, rutas, valor_hash, padre, (cliente, tiempo), (cliente.indice,), origen=self
+        )
+        return nueva_solucion
+
+    @staticmethod
+    def _calcular_hash(contexto, rutas: tuple) -> int:
+        """
+        Calcula desde cero el hash de 64 bits de las visitas (cliente, tiempo, cantidad) de las rutas.
+
+        Args:
+            contexto (Contexto): Contexto de ejecución.
+            rutas (tuple[Ruta]): Rutas de la solución.
+
+        Returns:
+            int: Hash de la solución.
+        """
+        claves = contexto.claves_hash
+        valor_hash = 0
+        for tiempo, ruta in enumerate(rutas):
+            for cliente, cantidad in zip(ruta.clientes, ruta.cantidades):
+                valor_hash ^= _hash_visita(claves[cliente.indice][tiempo], cantidad)
+        return valor_hash
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, otra: object) -> bool:
+        if not isinstance(otra, Solucion):
+            return NotImplemented
+        return self._hash == otra._hash
+
+    @property
+    def entregas(self) -> np.ndarray:
+        """Matriz clientes x periodos de cantidades entregadas."""
+        if self._entregas is None:
+            self._materializar()
+        return self._entregas
+
+    @property
+    def visitas(self) -> np.ndarray:
+        """Matriz booleana clientes x periodos de visitas."""
+        if self._entregas is None:
+            self._materializar()
+        return self._visitas
+
+    @property
+    def inventarios(self) -> np.ndarray:
+        """Matriz clientes x (periodos + 1) de niveles de inventario."""
+        if self._entregas is None:
+            self._materializar()
+        return self._inventarios
+
+    @property
+    def inventario_proveedor(self) -> np.ndarray:
+        """Niveles de inventario del proveedor en cada periodo (periodos + 1)."""
+        if self._entregas is None:
+            self._materializar()
+        return self._inventario_proveedor
+
+    @property
+    def violaciones_clientes(self) -> np.ndarray:
+        """Cantidad de periodos con inventario fuera de [nivel_minimo, nivel_maximo] de cada cliente."""
+        if self._entregas is None:
+            self._materializar()
+        return self._violaciones
+
+    @property
+    def clientes_modificados(self) -> list[Cliente]:
+        """Clientes tocados por la edición que originó esta solución (todos si se construyó desde las rutas)."""
+        if self._entregas is None:
+            self._materializar()
+        if self._clientes_modificados is None:
+            return list(self.contexto.clientes)
+        return [self.contexto.clientes[indice] for indice in self._clientes_modificados]
+
+    def cliente_admisible(self, cliente: Cliente) -> bool:
+        """True si el inventario del cliente se mantiene dentro de sus niveles mínimo y máximo en todos los periodos."""
+        return not self.violaciones_clientes[cliente.indice]
+
+    @property
+    def es_admisible(self) -> bool:
+        """True si ningún cliente tiene desabastecimiento ni sobreabastecimiento."""
+        if self._es_admisible is None:
+            self._evaluar()
+        return self._es_admisible
+
+    @property
+    def es_factible(self) -> bool:
+        """True si la solución es admisible, sin desabastecimiento en el proveedor y respeta la capacidad."""
+        if self._es_admisible is None:
+            self._evaluar()
+        return self._es_factible
+
+    @property
+    def costo_almacenamiento(self) -> float:
+        """Costo de almacenamiento del proveedor y de los clientes."""
+        if self._es_admisible is None:
+            self._evaluar()
+        return self._costo_almacenamiento
+
+    @property
+    def costo_transporte(self) -> float:
+        """Costo de los recorridos de todas las rutas."""
+        if self._es_admisible is None:
+            self._evaluar()
+        return self._costo_transporte
+
+    @property
+    def exceso_vehiculo(self) -> int:
+        """Exceso total de carga sobre la capacidad del vehículo, sin ponderar."""
+        if self._es_admisible is None:
+            self._evaluar()
+        return self._exceso_vehiculo
+
+    @property
+    def desabastecimiento_proveedor(self) -> int:
+        """Desabastecimiento total del proveedor, sin ponderar."""
+        if self._es_admisible is None:
+            self._evaluar()
+        return self._desabastecimiento_proveedor
+
+    @property
+    def inventario_clientes(self) -> dict:
+        """
+        Niveles de inventario de cada cliente, indexados por id (vista sobre la matriz `inventarios`).
+
+        Returns:
+            dict: Lista de niveles de inventario por id de cliente.
+        """
+        return {cliente.id: self.inventarios[cliente.indice].tolist() for cliente in self.contexto.clientes}
 
     def __str__(self) -> str:
         factibilidad = "F" if (self.es_factible == True) else ("A" if (self.es_admisible == True) else "N")
@@ -41,6 +415,7 @@ class Solucion:
             "tag": tag,
             "rutas": {i: ruta.__json__() for i, ruta in enumerate(self.rutas)},
             "costo": self.costo(),
+            "componentes_costo": self.componentes_costo(),
         }
 
     def imprimir_detalle(self) -> str:
@@ -51,7 +426,7 @@ class Solucion:
                 str: Resumen de las rutas, costo y estado de factibilidad.
             """
             resp = "Clientes visitados:"        +" ".join(f"T{str(i+1)} = {ruta}    "  for i, ruta in enumerate(self.rutas)) + "\n"
-            resp += 'Inventario de proveedor: ' + str(self.inventario_proveedor) + "\n"
+            resp += 'Inventario de proveedor: ' + str(self.inventario_proveedor.tolist()) + "\n"
             resp += 'Inventario de clientes: '  + str(self.inventario_clientes) + "\n"
             resp += '¿Admisible? : '            + ('SI' if self.es_admisible else 'NO') + "\n"
             resp += '¿Factible? : '             + ('SI' if self.es_factible else 'NO') + "\n"
@@ -59,29 +434,83 @@ class Solucion:
             print(resp)
             
     def clonar(self) -> 'Solucion':
-        return Solucion(rutas=self.rutas)
+        """
+        Crea una copia de la solución que comparte las rutas y el estado ya calculado, que son inmutables.
 
-    def es_admisible(self) -> bool:
+        Returns:
+            Solucion: Copia de la solución.
+        """
+        copia = Solucion.__new__(Solucion)
+        for atributo in Solucion.__slots__:
+            setattr(copia, atributo, getattr(self, atributo))
+        return copia
+
+    def como_origen(self) -> 'Solucion':
+        """
+        Copia de la solución marcada como origen de movimientos: las soluciones que se deriven de ella
+        registran los clientes que cambian respecto de esta (ver `visitas_cambiadas`).
+
+        Returns:
+            Solucion: Copia de la solución.
+        """
+        copia = self.clonar()
+        copia._hash_origen = copia._clientes_origen = None
+        return copia
+
+    def clientes_cambiados(self, origen: 'Solucion') -> list[Cliente]:
+        """
+        Clientes cuyas visitas difieren entre `origen` y esta solución, ordenados por índice. Si la solución
+        se derivó de `origen`, sólo se comparan las filas de los clientes tocados desde entonces.
+
+        Args:
+            origen (Solucion): Solución de referencia.
+
+        Returns:
+            list[Cliente]: Clientes con visitas distintas.
+        """
+        if self._hash_origen is not None and self._hash_origen == origen._hash:
+            indices = sorted(self._clientes_origen)
+            distintos = (self.visitas[indices] != origen.visitas[indices]).any(axis=1)
+            return [self.contexto.clientes[i] for i, distinto in zip(indices, distintos) if distinto]
+        return [self.contexto.clientes[i] for i in np.flatnonzero((self.visitas != origen.visitas).any(axis=1))]
+
+    def visitas_cambiadas(self, origen: 'Solucion') -> tuple[list[tuple], list[tuple]]:
+        """
+        Movimiento que lleva de `origen` a esta solución, como visitas (cliente, tiempo) removidas y agregadas.
+
+        Args:
+            origen (Solucion): Solución de referencia.
+
+        Returns:
+            tuple[list[tuple], list[tuple]]: Visitas removidas y visitas agregadas.
+        """
+        removidas, agregadas = [], []
+        for cliente in self.clientes_cambiados(origen):
+            fila, fila_origen = self.visitas[cliente.indice], origen.visitas[cliente.indice]
+            removidas.extend((cliente, int(t)) for t in np.flatnonzero(fila_origen & ~fila))
+            agregadas.extend((cliente, int(t)) for t in np.flatnonzero(fila & ~fila_origen))
+        return removidas, agregadas
+
+    def editar(self) -> 'BorradorSolucion':
+        """
+        Crea un borrador mutable de la solución para aplicar varias ediciones de visitas
+        y construir la nueva solución una única vez con `confirmar()`.
+
+        Returns:
+            BorradorSolucion: Borrador inicializado con las rutas y matrices de esta solución.
+        """
+        return BorradorSolucion(self)
+
+    def _calcular_admisibilidad(self) -> bool:
         """
         Verifica si la solución es admisible (sin desabastecimiento ni sobreabastecimiento en clientes).
 
         Returns:
             bool: True si la solución es admisible, False en caso contrario.
         """
-        cliente_sin_desabastecimiento = all(
-            self.inventario_clientes[cliente.id][t] >= cliente.nivel_minimo
-            for cliente in self.contexto.clientes
-            for t in range(self.contexto.horizonte_tiempo + 1)
-        )
+        return not self.violaciones_clientes.any()
 
-        cliente_sin_sobreabastecimiento = all(
-            self.inventario_clientes[cliente.id][t] <= cliente.nivel_maximo
-            for cliente in self.contexto.clientes
-            for t in range(self.contexto.horizonte_tiempo + 1)
-        )
-        return cliente_sin_desabastecimiento and cliente_sin_sobreabastecimiento
-
-    def es_factible(self) -> bool:
+    def _calcular_factibilidad(self) -> bool:
         """
         Verifica si una solución es factible: Para ello, la solución es admisible, no tiene desabastecimiento en el proveedor
         y no se excede la capacidad del vehículo.
@@ -89,11 +518,13 @@ class Solucion:
         Returns:
             bool: True si la solución cumple todas las restricciones, False en caso contrario.
         """
-        return self.es_admisible and self.proveedor_sin_desabastecimiento() and self.respeta_capacidad_vehiculo()
+        return self._es_admisible and self.proveedor_sin_desabastecimiento() and self.respeta_capacidad_vehiculo()
 
     def es_igual(self, solucion2: "Solucion") -> bool:
         """
-        Verifica si esta solución es igual a otra.
+        Verifica si esta solución es igual a otra: mismos clientes, en el mismo orden, y mismas cantidades en
+        cada ruta. El hash no depende del orden de las rutas, por lo que sólo sirve para descartar rápido las
+        soluciones con visitas o cantidades distintas.
 
         Args:
             solucion2 (Solucion): La solución a comparar.
@@ -103,6 +534,7 @@ class Solucion:
         """
         return (
             solucion2 is not None
+            and self._hash == solucion2._hash
             and all(r1.es_igual(r2) for r1, r2 in zip(self.rutas, solucion2.rutas))
         )
 
@@ -113,7 +545,7 @@ class Solucion:
         Returns:
             bool: True si el proveedor tiene inventario por debajo de 0.
         """
-        return all(nivel >= 0 for nivel in self.inventario_proveedor)
+        return bool((self.inventario_proveedor >= 0).all())
 
     def respeta_capacidad_vehiculo(self) -> bool:
         """
@@ -125,18 +557,18 @@ class Solucion:
         return all(self.contexto.capacidad_vehiculo >= ruta.obtener_total_entregado() for ruta in self.rutas)
 
     def insertar_visita_atomica(self, cliente: Cliente, tiempo: int, index = None) -> 'Solucion':            
-        cantidad = cliente.nivel_maximo - self.inventario_clientes[cliente.id][tiempo]
+        cantidad = int(cliente.nivel_maximo - self.inventarios[cliente.indice, tiempo])
         if self.contexto.politica_reabastecimiento == "ML":
             cantidad = random.randint(min(cantidad, cliente.nivel_demanda), cantidad)  
                 
         rutas_modificadas = list(ruta for ruta in self.rutas)
         rutas_modificadas[tiempo] = rutas_modificadas[tiempo].insertar_visita(cliente, cantidad, index)
-        return Solucion(rutas=tuple(rutas_modificadas))
+        return self._derivar(tuple(rutas_modificadas), cliente, tiempo)
 
     def eliminar_visita_atomica(self, cliente: Cliente, tiempo: int) -> 'Solucion':
         rutas_modificadas = list(ruta for ruta in self.rutas)
         rutas_modificadas[tiempo] = rutas_modificadas[tiempo].eliminar_visita(cliente)
-        return Solucion(rutas=tuple(rutas_modificadas))
+        return self._derivar(tuple(rutas_modificadas), cliente, tiempo)
 
     def quitar_cantidad_cliente(self, cliente: Cliente, tiempo: int, cantidad: int) -> 'Solucion':
         """
@@ -153,7 +585,7 @@ class Solucion:
         rutas_modificadas = list(ruta for ruta in self.rutas)
         rutas_modificadas[tiempo] = rutas_modificadas[tiempo].quitar_cantidad_cliente(cliente, cantidad)
         
-        return Solucion(rutas=tuple(rutas_modificadas))
+        return self._derivar(tuple(rutas_modificadas), cliente, tiempo)
 
     def agregar_cantidad_cliente(self, cliente: Cliente, tiempo: int, cantidad: int) -> 'Solucion':
         """
@@ -170,7 +602,7 @@ class Solucion:
         rutas_modificadas = list(ruta for ruta in self.rutas)
         rutas_modificadas[tiempo]= rutas_modificadas[tiempo].agregar_cantidad_cliente(cliente, cantidad)
         
-        return Solucion(rutas=tuple(rutas_modificadas))
+        return self._derivar(tuple(rutas_modificadas), cliente, tiempo)
 
     def establecer_cantidad_cliente(self, cliente: Cliente, tiempo: int, cantidad: int) -> 'Solucion':
         """
@@ -186,7 +618,7 @@ class Solucion:
         """
         rutas_modificadas = list(ruta for ruta in self.rutas)
         rutas_modificadas[tiempo] = rutas_modificadas[tiempo].establecer_cantidad_cliente(cliente, cantidad)
-        return Solucion(rutas=tuple(rutas_modificadas))
+        return self._derivar(tuple(rutas_modificadas), cliente, tiempo)
 
     def merge_rutas(self, indice_ruta_principal: int, indice_ruta_secundaria: int) -> 'Solucion':
         """
@@ -204,114 +636,120 @@ class Solucion:
             if c not in clientes:
                 clientes.append(c)
         
-        nueva_solucion = []
-        for index, r in enumerate(self.rutas):
-            if (index not in [indice_ruta_principal, indice_ruta_secundaria]):
-                nueva_solucion.append(r.clonar())
-            else:
-                nueva_solucion.append(Ruta(tuple(), tuple()))        
-        nueva_solucion = Solucion(rutas=tuple(r for r in nueva_solucion))
+        borrador = self.editar()
+        borrador.establecer_ruta(indice_ruta_principal, Ruta(tuple(), tuple()))
+        borrador.establecer_ruta(indice_ruta_secundaria, Ruta(tuple(), tuple()))
         
         for c in clientes:
-            nueva_solucion = nueva_solucion.insertar_visita(c, indice_ruta_principal)
+            borrador.insertar_visita(c, indice_ruta_principal)
 
-        return nueva_solucion
+        return borrador.confirmar()
 
     def tiempos_cliente(self, cliente: Cliente):
-        return [t for t in range(self.contexto.horizonte_tiempo) if self.rutas[t].es_visitado(cliente)]
+        return np.flatnonzero(self.visitas[cliente.indice]).tolist()
+
+    def tiempos_destino(self, cliente: Cliente) -> list[int]:
+        """
+        Tiempos a los que se puede mover una visita del cliente: los tiempos en los que no se lo visita.
+        Con `candidatos_mover` se limitan a rutas vacías o que visitan a algún candidato del cliente.
+        """
+        destinos = ~self.visitas[cliente.indice]
+        if self.contexto.candidatos_mover:
+            visitas = self.visitas
+            destinos &= visitas[self.contexto.matriz_candidatos[cliente.indice]].any(axis=0) | ~visitas.any(axis=0)
+        return np.flatnonzero(destinos).tolist()
 
     def insertar_visita(self, cliente, t, indice = None):
         """
-        Inserta una visita siguiendo estrictamente las políticas OU y ML según el paper.
-        
-        Teoría:
-        1. Primero agregar el cliente a la ruta usando el método de inserción más barato
-        2. Luego establecer la cantidad según la política:
-        - OU: Ui - nivel_actual, y reducir la misma cantidad de la siguiente visita
-        - ML: min(Ui - nivel_actual, capacidad_vehiculo, stock_proveedor), o rit si es 0
-                (puede violar restricciones de capacidad pero mantiene solución admisible)
-        """    
-        nueva_solucion = self.insertar_visita_atomica(cliente, t, indice)
-        if nueva_solucion.contexto.politica_reabastecimiento == "OU":     
-            # Buscar siguiente visita y reducir la misma cantidad
-            t_next = next((t_futuro for t_futuro in nueva_solucion.tiempos_cliente(cliente) if t_futuro > t), None)
-            if t_next is not None:
-                cantidad_entregada          = nueva_solucion.rutas[t].obtener_cantidad_entregada(cliente.id)
-                proxima_cantidad_entregada  = nueva_solucion.rutas[t_next].obtener_cantidad_entregada(cliente.id)
-                if proxima_cantidad_entregada > cantidad_entregada:
-                    nueva_solucion = nueva_solucion.quitar_cantidad_cliente(cliente, t_next, cantidad_entregada)
-                else:
-                    nueva_solucion = nueva_solucion.eliminar_visita_atomica(cliente, t_next)
-        return nueva_solucion
+        Inserta una visita siguiendo las políticas OU y ML (ver `BorradorSolucion.insertar_visita`).
 
+        Returns:
+            Solucion: Nueva instancia de Solución con la visita insertada.
+        """
+        borrador = self.editar()
+        borrador.insertar_visita(cliente, t, indice)
+        return borrador.confirmar()
 
     def eliminar_visita(self, cliente, t):
         """
-        Elimina una visita siguiendo estrictamente las políticas OU y ML según el paper.
-        
-        Teoría:
-        1. Primero eliminar el cliente de la ruta y enlazar predecesor con sucesor
-        2. Luego según la política:
-        - OU: Transferir cantidad a siguiente visita, solo si no causa stockout
-        - ML: Si no hay stockout, eliminar. Si hay, intentar compensar con visita anterior
-        """    
-        # Obtener cantidad antes de eliminar
-        tiempos_cliente = self.tiempos_cliente(cliente)
-        cantidad_eliminada = self.rutas[t].obtener_cantidad_entregada(cliente)
-        nueva_solucion = self.eliminar_visita_atomica(cliente, t)
-        
-        if nueva_solucion.contexto.politica_reabastecimiento == "OU":    
-            # Transferir cantidad a siguiente visita        
-            t_next = next((t_futuro for t_futuro in tiempos_cliente if t_futuro > t), None)
-            if t_next is not None:
-                nueva_solucion = nueva_solucion.agregar_cantidad_cliente(cliente, t_next, cantidad_eliminada)
-            return nueva_solucion if all(nivel >= cliente.nivel_minimo for nivel in nueva_solucion.inventario_clientes[cliente.id]) else self.clonar()
-        
-        elif nueva_solucion.contexto.politica_reabastecimiento == "ML":
-            if all(nivel >= cliente.nivel_minimo for nivel in nueva_solucion.inventario_clientes[cliente.id]):
-                return nueva_solucion.clonar()
-            
-            t_prev = next((t_pasado for t_pasado in reversed(tiempos_cliente) if t_pasado < t), None)
-            if t_prev is not None:
-                y = min(nueva_solucion.inventario_clientes[cliente.id][t:])
-                if y < cantidad_eliminada:
-                    nueva_solucion = nueva_solucion.agregar_cantidad_cliente(cliente, t_prev, cantidad_eliminada - y)
-                    if all(nivel <= cliente.nivel_maximo for nivel in nueva_solucion.inventario_clientes[cliente.id]) and (all(nivel >= cliente.nivel_minimo for nivel in nueva_solucion.inventario_clientes[cliente.id])):
-                        return nueva_solucion.clonar()
-            return self.clonar()
-    
-    def _obtener_niveles_inventario_cliente(self, cliente: Cliente):
-        inventario = [cliente.nivel_almacenamiento]   
-        for t in range(self.contexto.horizonte_tiempo):
-            cantidad_entregada = self.rutas[t].obtener_cantidad_entregada(cliente)
-            nuevo_nivel = inventario[-1] + cantidad_entregada - cliente.nivel_demanda
-            inventario.append(nuevo_nivel)
-        return inventario
+        Elimina una visita siguiendo las políticas OU y ML (ver `BorradorSolucion.eliminar_visita`).
+        Si la eliminación no es posible, devuelve una solución igual a esta.
+
+        Returns:
+            Solucion: Nueva instancia de Solución con la visita eliminada.
+        """
+        borrador = self.editar()
+        borrador.eliminar_visita(cliente, t)
+        return borrador.confirmar()
+
+    def _obtener_matriz_entregas(self) -> np.ndarray:
+        """
+        Construye la matriz clientes x periodos con las cantidades entregadas en cada ruta.
+        """
+        entregas = np.zeros((len(self.contexto.clientes), self.contexto.horizonte_tiempo), dtype=np.int32)
+        for t, ruta in enumerate(self.rutas):
+            for cliente, cantidad in zip(reversed(ruta.clientes), reversed(ruta.cantidades)):
+                entregas[cliente.indice, t] = cantidad
+        return entregas
 
-    def _obtener_niveles_inventario_proveedor(self):
-        inventario = [self.contexto.proveedor.nivel_almacenamiento]
-        for t in range(self.contexto.horizonte_tiempo):
-            total_entregado = self.rutas[t].obtener_total_entregado()
-            nuevo_nivel = inventario[-1] + self.contexto.proveedor.nivel_produccion - total_entregado
-            inventario.append(nuevo_nivel)
+    def _obtener_matriz_visitas(self) -> np.ndarray:
+        """
+        Construye la matriz booleana clientes x periodos que indica qué clientes visita cada ruta.
+        """
+        visitas = np.zeros((len(self.contexto.clientes), self.contexto.horizonte_tiempo), dtype=bool)
+        for t, ruta in enumerate(self.rutas):
+            visitas[[cliente.indice for cliente in ruta.clientes], t] = True
+        return visitas
+
+    def _obtener_matriz_inventarios(self) -> np.ndarray:
+        """
+        Calcula los niveles de inventario de todos los clientes (clientes x periodos + 1) con sumas acumuladas.
+        """
+        contexto = self.contexto
+        inventarios = np.empty((len(contexto.clientes), contexto.horizonte_tiempo + 1), dtype=np.int32)
+        inventarios[:, 0] = contexto.niveles_iniciales
+        np.cumsum(self.entregas - contexto.demandas[:, None], axis=1, out=inventarios[:, 1:])
+        inventarios[:, 1:] += contexto.niveles_iniciales[:, None]
+        return inventarios
+
+    def _obtener_niveles_inventario_cliente(self, cliente: Cliente) -> np.ndarray:
+        return _niveles_inventario_cliente(cliente, self.entregas[cliente.indice])
+
+    def _obtener_niveles_inventario_proveedor(self) -> np.ndarray:
+        proveedor = self.contexto.proveedor
+        inventario = np.empty(self.contexto.horizonte_tiempo + 1, dtype=np.int64)
+        inventario[0] = proveedor.nivel_almacenamiento
+        np.cumsum(proveedor.nivel_produccion - self.entregas.sum(axis=0), out=inventario[1:])
+        inventario[1:] += proveedor.nivel_almacenamiento
         return inventario
 
 
     def costo(self) -> float:
-        costo_almacenamiento = ( self.contexto.proveedor.costo_almacenamiento * sum(self.inventario_proveedor) + 
-            sum(c.costo_almacenamiento * sum(self.inventario_clientes[c.id]) for c in self.contexto.clientes)
-        )
-        costo_transporte = sum(ruta.costo for ruta in self.rutas)
-               
-        exceso_vehiculo = sum( max(0, ruta.obtener_total_entregado() - self.contexto.capacidad_vehiculo) 
-            for ruta in self.rutas
-        )
-        
-        desabastecimiento_proveedor = sum(max(0, -nivel) for nivel in self.inventario_proveedor)
+        """
+        Combina los componentes del costo con los factores de penalización vigentes.
+
+        Returns:
+            float: Costo total de la solución.
+        """
+        return round(self.costo_almacenamiento + self.costo_transporte + 
+            (self.exceso_vehiculo * self.contexto.alfa.obtener_valor()) +
+            (self.desabastecimiento_proveedor * self.contexto.beta.obtener_valor()), 2)
+
+    def componentes_costo(self) -> dict:
+        """
+        Desglose del costo de la solución, con el exceso de capacidad y el desabastecimiento sin ponderar.
 
-        return round(costo_almacenamiento + costo_transporte + 
-            (exceso_vehiculo * self.contexto.alfa.obtener_valor()) +
-            (desabastecimiento_proveedor * self.contexto.beta.obtener_valor()), 2)
+        Returns:
+            dict: Componentes del costo y factores de penalización vigentes.
+        """
+        return {
+            "almacenamiento": round(self.costo_almacenamiento, 2),
+            "transporte": round(self.costo_transporte, 2),
+            "exceso_vehiculo": self.exceso_vehiculo,
+            "desabastecimiento_proveedor": self.desabastecimiento_proveedor,
+            "alfa": self.contexto.alfa.obtener_valor(),
+            "beta": self.contexto.beta.obtener_valor(),
+        }
         
 
     def graficar_rutas(self):
@@ -353,3 +791,196 @@ class Solucion:
 
         plt.tight_layout()
         plt.show()
+
+
+class BorradorSolucion:
+    """
+    Borrador mutable de una solución, para aplicar varias ediciones de visitas (inserciones,
+    eliminaciones y cambios de cantidad) y construir la nueva solución una única vez.
+
+    Se obtiene con `Solucion.editar()`. Mantiene una copia de las rutas y de las matrices de entregas
+    y visitas, que se actualizan con cada edición, y el hash de la solución. Los niveles de inventario
+    de un cliente se calculan a demanda a partir de su fila de entregas. `confirmar()` construye la
+    Solucion recalculando sólo los inventarios de los clientes modificados; después de confirmar,
+    el borrador no puede seguir usándose.
+    """
+
+    __slots__ = ('contexto', 'original', 'rutas', 'entregas', 'visitas', '_hash', '_clientes_modificados')
+
+    def __init__(self, solucion: Solucion) -> None:
+        """
+        Args:
+            solucion (Solucion): Solución a partir de la que se edita.
+        """
+        self.contexto = solucion.contexto
+        self.original = solucion
+        self.rutas = list(solucion.rutas)
+        self.entregas = solucion.entregas.copy()
+        self.visitas = solucion.visitas.copy()
+        self._hash = solucion._hash
+        self._clientes_modificados = set()
+
+    def _actualizar_visita(self, cliente: Cliente, tiempo: int, ruta: Ruta) -> None:
+        """
+        Reemplaza la ruta de un tiempo en el que sólo cambió la visita de un cliente, y actualiza
+        las matrices y el hash.
+        """
+        ruta_anterior = self.rutas[tiempo]
+        clave = self.contexto.claves_hash[cliente.indice][tiempo]
+        for r in (ruta_anterior, ruta):
+            if r.es_visitado(cliente):
+                self._hash ^= _hash_visita(clave, r.obtener_cantidad_entregada(cliente))
+        self.rutas[tiempo] = ruta
+        self.entregas[cliente.indice, tiempo] = ruta.obtener_cantidad_entregada(cliente)
+        self.visitas[cliente.indice, tiempo] = ruta.es_visitado(cliente)
+        self._clientes_modificados.add(cliente.indice)
+
+    def establecer_ruta(self, tiempo: int, ruta: Ruta) -> None:
+        """
+        Reemplaza completamente la ruta de un tiempo.
+
+        Args:
+            tiempo (int): Tiempo de la ruta.
+            ruta (Ruta): Nueva ruta.
+        """
+        claves = self.contexto.claves_hash
+        for r in (self.rutas[tiempo], ruta):
+            for cliente, cantidad in zip(r.clientes, r.cantidades):
+                self._hash ^= _hash_visita(claves[cliente.indice][tiempo], cantidad)
+                self.entregas[cliente.indice, tiempo] = 0
+                self.visitas[cliente.indice, tiempo] = False
+                self._clientes_modificados.add(cliente.indice)
+        for cliente, cantidad in zip(reversed(ruta.clientes), reversed(ruta.cantidades)):
+            self.entregas[cliente.indice, tiempo] = cantidad
+            self.visitas[cliente.indice, tiempo] = True
+        self.rutas[tiempo] = ruta
+
+    def inventario_cliente(self, cliente: Cliente) -> np.ndarray:
+        """
+        Niveles de inventario del cliente (periodos + 1) con las ediciones aplicadas hasta el momento.
+        """
+        return _niveles_inventario_cliente(cliente, self.entregas[cliente.indice])
+
+    def tiempos_cliente(self, cliente: Cliente) -> list[int]:
+        return np.flatnonzero(self.visitas[cliente.indice]).tolist()
+
+    def insertar_visita_atomica(self, cliente: Cliente, tiempo: int, index = None, cantidad: int = None) -> None:
+        if cantidad is None:
+            cantidad = int(cliente.nivel_maximo - self.inventario_cliente(cliente)[tiempo])
+            if self.contexto.politica_reabastecimiento == "ML":
+                cantidad = random.randint(min(cantidad, cliente.nivel_demanda), cantidad)
+        self._actualizar_visita(cliente, tiempo, self.rutas[tiempo].insertar_visita(cliente, cantidad, index))
+
+    def eliminar_visita_atomica(self, cliente: Cliente, tiempo: int) -> None:
+        self._actualizar_visita(cliente, tiempo, self.rutas[tiempo].eliminar_visita(cliente))
+
+    def quitar_cantidad_cliente(self, cliente: Cliente, tiempo: int, cantidad: int) -> None:
+        self._actualizar_visita(cliente, tiempo, self.rutas[tiempo].quitar_cantidad_cliente(cliente, cantidad))
+
+    def agregar_cantidad_cliente(self, cliente: Cliente, tiempo: int, cantidad: int) -> None:
+        self._actualizar_visita(cliente, tiempo, self.rutas[tiempo].agregar_cantidad_cliente(cliente, cantidad))
+
+    def establecer_cantidad_cliente(self, cliente: Cliente, tiempo: int, cantidad: int) -> None:
+        self._actualizar_visita(cliente, tiempo, self.rutas[tiempo].establecer_cantidad_cliente(cliente, cantidad))
+
+    def insertar_visita(self, cliente: Cliente, t: int, indice = None) -> None:
+        """
+        Inserta una visita siguiendo estrictamente las políticas OU y ML según el paper.
+        
+        Teoría:
+        1. Primero agregar el cliente a la ruta usando el método de inserción más barato
+        2. Luego establecer la cantidad según la política:
+        - OU: Ui - nivel_actual, y reducir la misma cantidad de la siguiente visita
+        - ML: min(Ui - nivel_actual, capacidad_vehiculo, stock_proveedor), o rit si es 0
+                (puede violar restricciones de capacidad pero mantiene solución admisible)
+        """
+        self.insertar_visita_atomica(cliente, t, indice)
+        if self.contexto.politica_reabastecimiento == "OU":
+            # Buscar siguiente visita y reducir la misma cantidad
+            t_next = next((t_futuro for t_futuro in self.tiempos_cliente(cliente) if t_futuro > t), None)
+            if t_next is not None:
+                cantidad_entregada          = self.rutas[t].obtener_cantidad_entregada(cliente)
+                proxima_cantidad_entregada  = self.rutas[t_next].obtener_cantidad_entregada(cliente)
+                if proxima_cantidad_entregada > cantidad_entregada:
+                    self.quitar_cantidad_cliente(cliente, t_next, cantidad_entregada)
+                else:
+                    self.eliminar_visita_atomica(cliente, t_next)
+
+    def eliminar_visita(self, cliente: Cliente, t: int) -> bool:
+        """
+        Elimina una visita siguiendo estrictamente las políticas OU y ML según el paper.
+        
+        Teoría:
+        1. Primero eliminar el cliente de la ruta y enlazar predecesor con sucesor
+        2. Luego según la política:
+        - OU: Transferir cantidad a siguiente visita, solo si no causa stockout
+        - ML: Si no hay stockout, eliminar. Si hay, intentar compensar con visita anterior
+
+        Si la eliminación no es posible, el borrador queda como estaba.
+
+        Returns:
+            bool: True si la visita se eliminó.
+        """
+        # Estado del cliente antes de eliminar, para deshacer la edición
+        tiempos_cliente = self.tiempos_cliente(cliente)
+        rutas_previas = list(self.rutas)
+        entregas_previas = self.entregas[cliente.indice].copy()
+        visitas_previas = self.visitas[cliente.indice].copy()
+        hash_previo = self._hash
+        cliente_ya_modificado = cliente.indice in self._clientes_modificados
+
+        # Obtener cantidad antes de eliminar
+        cantidad_eliminada = self.rutas[t].obtener_cantidad_entregada(cliente)
+        self.eliminar_visita_atomica(cliente, t)
+
+        if self.contexto.politica_reabastecimiento == "OU":
+            # Transferir cantidad a siguiente visita
+            t_next = next((t_futuro for t_futuro in tiempos_cliente if t_futuro > t), None)
+            if t_next is not None:
+                self.agregar_cantidad_cliente(cliente, t_next, cantidad_eliminada)
+            if (self.inventario_cliente(cliente) >= cliente.nivel_minimo).all():
+                return True
+
+        elif self.contexto.politica_reabastecimiento == "ML":
+            if (self.inventario_cliente(cliente) >= cliente.nivel_minimo).all():
+                return True
+
+            t_prev = next((t_pasado for t_pasado in reversed(tiempos_cliente) if t_pasado < t), None)
+            if t_prev is not None:
+                y = int(self.inventario_cliente(cliente)[t:].min())
+                if y < cantidad_eliminada:
+                    self.agregar_cantidad_cliente(cliente, t_prev, cantidad_eliminada - y)
+                    if _violaciones_cliente(cliente, self.inventario_cliente(cliente)) == 0:
+                        return True
+
+        self.rutas = rutas_previas
+        self.entregas[cliente.indice] = entregas_previas
+        self.visitas[cliente.indice] = visitas_previas
+        self._hash = hash_previo
+        if not cliente_ya_modificado:
+            self._clientes_modificados.discard(cliente.indice)
+        return False
+
+    def confirmar(self) -> Solucion:
+        """
+        Construye la solución con todas las ediciones aplicadas, recalculando sólo los inventarios
+        de los clientes modificados.
+
+        Returns:
+            Solucion: Nueva instancia de Solución (la original si no hubo modificaciones).
+        """
+        original = self.original
+        if not self._clientes_modificados:
+            nueva_solucion = original
+        else:
+            clientes_modificados = tuple(sorted(self._clientes_modificados))
+            nueva_solucion = Solucion.__new__(Solucion)
+            nueva_solucion._inicializar(
+                self.contexto, tuple(self.rutas), self._hash, clientes_modificados=clientes_modificados, origen=original
+            )
+            inventarios = original.inventarios.copy()
+            for indice in clientes_modificados:
+                inventarios[indice] = _niveles_inventario_cliente(self.contexto.clientes[indice], self.entregas[indice])
+            nueva_solucion._fijar_matrices(self.entregas, self.visitas, inventarios, original)
+        self.rutas = self.entregas = self.visitas = None
+        return nueva_solucion